@@ -0,0 +1,121 @@
+"""
+Micro-benchmark of `StripeSyncActionMixin.set_default` on subscription payloads
+
+Compares the compiled field plan with the previous implementation which
+reflected on the model fields for every object.
+
+command: python -m benchmarks.set_default [--objects 20000] [--repeat 5]
+"""
+
+# Standard Library
+import argparse
+import os
+import timeit
+
+# Third Party Stuff
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+django.setup()
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeSubscriptionAction  # noqa: E402
+from django_stripe.utils import convert_epoch  # noqa: E402
+
+SUBSCRIPTION = {
+    "object": "subscription",
+    "application": None,
+    "application_fee_percent": 12.5,
+    "automatic_tax": {"enabled": False, "liability": None},
+    "billing_cycle_anchor": 1679609767,
+    "billing_thresholds": None,
+    "cancel_at": None,
+    "cancel_at_period_end": False,
+    "canceled_at": None,
+    "cancellation_details": {"comment": None, "feedback": None, "reason": None},
+    "collection_method": "charge_automatically",
+    "created": 1679609767,
+    "currency": "usd",
+    "current_period_end": 1682288167,
+    "current_period_start": 1679609767,
+    "customer": "cus_Na6dX7aXxi11N4",
+    "days_until_due": None,
+    "default_payment_method": None,
+    "default_source": None,
+    "default_tax_rates": [],
+    "description": None,
+    "discount": None,
+    "discounts": None,
+    "ended_at": None,
+    "invoice_settings": {"issuer": {"type": "self"}},
+    "items": {"object": "list", "data": [], "has_more": False, "total_count": 0},
+    "latest_invoice": "in_1MowQWLkdIwHu7ixuzkSPfKd",
+    "livemode": False,
+    "metadata": {},
+    "next_pending_invoice_item_invoice": None,
+    "on_behalf_of": None,
+    "pause_collection": None,
+    "payment_settings": {"save_default_payment_method": "off"},
+    "pending_invoice_item_interval": None,
+    "pending_setup_intent": None,
+    "pending_update": None,
+    "quantity": 1,
+    "schedule": None,
+    "start_date": 1679609767,
+    "status": "active",
+    "test_clock": None,
+    "transfer_data": None,
+    "trial_end": None,
+    "trial_settings": {"end_behavior": {"missing_payment_method": "create_invoice"}},
+    "trial_start": None,
+}
+
+
+def reflective_set_default(model_class, stripe_data):
+    """previous implementation of `set_default`"""
+    defaults = {}
+
+    for field in model_class._meta.get_fields():
+        if field.name not in stripe_data:
+            continue
+
+        field_type = field.get_internal_type()
+
+        if field_type == "DateTimeField":
+            defaults[field.name] = (
+                convert_epoch(stripe_data[field.name])
+                if stripe_data[field.name]
+                else None
+            )
+        elif field_type in ["CharField", "TextField"]:
+            defaults[field.name] = stripe_data[field.name] or ""
+        else:
+            defaults[field.name] = stripe_data[field.name]
+
+    return defaults
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    action = StripeSubscriptionAction()
+    model_class = action.model_class
+
+    def measure(func):
+        # the fastest run is the least disturbed by other processes
+        return min(timeit.repeat(func, number=args.objects, repeat=args.repeat))
+
+    reflective = measure(lambda: reflective_set_default(model_class, SUBSCRIPTION))
+    compiled = measure(lambda: action.set_default(SUBSCRIPTION))
+
+    print(f"payload fields:  {len(SUBSCRIPTION)}")
+    print(f"reflective:      {reflective / args.objects * 1e6:8.2f} us/object")
+    print(f"compiled plan:   {compiled / args.objects * 1e6:8.2f} us/object")
+    print(f"speedup:         {reflective / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
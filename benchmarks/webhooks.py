@@ -0,0 +1,345 @@
+"""
+Load test of the webhook processing path against an offline fake Stripe
+
+Generates a stream of customer, subscription, price, product and coupon events
+with duplicate and out of order deliveries and delivers them to
+`StripeWebhook.process_webhook`, either signed and verified locally or
+unsigned and retrieved from a fake `stripe.Event.retrieve` with a latency.
+Runs in a throwaway test database of `tests.settings`.
+
+command: python -m benchmarks.webhooks [--events 2000] [--concurrency 4] [--signed]
+"""
+
+# Standard Library
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Third Party Stuff
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+django.setup()
+
+import stripe  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+# Django Stripe Stuff
+from benchmarks.set_default import SUBSCRIPTION  # noqa: E402
+from django_stripe.actions import (  # noqa: E402
+    StripeCustomerAction,
+    StripeProductAction,
+    StripeWebhook,
+)
+from django_stripe.models import StripeEvent  # noqa: E402
+
+WEBHOOK_SECRET = "whsec_benchmark"
+
+# share of every kind in the generated stream
+KINDS = {
+    "customer.subscription.updated": 0.4,
+    "customer.updated": 0.2,
+    "price.updated": 0.15,
+    "product.updated": 0.15,
+    "coupon.updated": 0.1,
+}
+
+
+def make_customer(index, version):
+    return {
+        "id": f"cus_bench{index}",
+        "object": "customer",
+        "created": 1680893993,
+        "email": f"customer{index}@example.com",
+        "livemode": False,
+        "metadata": {"version": version},
+        "name": f"Customer {index} v{version}",
+    }
+
+
+def make_product(index, version):
+    return {
+        "id": f"prod_bench{index}",
+        "object": "product",
+        "active": True,
+        "created": 1678833149,
+        "description": None,
+        "images": [],
+        "livemode": False,
+        "metadata": {},
+        "name": f"Plan {index} v{version}",
+        "updated": 1678833149 + version,
+        "url": None,
+    }
+
+
+def make_price(index, version):
+    return {
+        "id": f"price_bench{index}",
+        "object": "price",
+        "active": True,
+        "billing_scheme": "per_unit",
+        "created": 1679431181,
+        "currency": "usd",
+        "livemode": False,
+        "lookup_key": None,
+        "metadata": {},
+        "nickname": f"v{version}",
+        "product": f"prod_bench{index}",
+        "recurring": {"interval": "month", "interval_count": 1},
+        "type": "recurring",
+        "unit_amount": 1000 + version,
+        "unit_amount_decimal": str(1000 + version),
+    }
+
+
+def make_subscription(index, version):
+    return {
+        **SUBSCRIPTION,
+        "id": f"sub_bench{index}",
+        "customer": f"cus_bench{index}",
+        "quantity": version,
+    }
+
+
+def make_coupon(index, version):
+    return {
+        "id": f"coupon_bench{index}",
+        "object": "coupon",
+        "amount_off": None,
+        "created": 1678037688,
+        "currency": None,
+        "duration": "repeating",
+        "duration_in_months": 3,
+        "livemode": False,
+        "max_redemptions": None,
+        "metadata": {},
+        "name": f"Coupon {index} v{version}",
+        "percent_off": 25.5,
+        "redeem_by": None,
+        "times_redeemed": version,
+        "valid": True,
+    }
+
+
+BUILDERS = {
+    "customer.subscription.updated": make_subscription,
+    "customer.updated": make_customer,
+    "price.updated": make_price,
+    "product.updated": make_product,
+    "coupon.updated": make_coupon,
+}
+
+
+def generate_events(count, objects, duplicates, out_of_order, seed=0) -> list:
+    """
+    Returns the deliveries of `count` events, a share of `duplicates` is
+    delivered again and a share of `out_of_order` swapped with the previous one
+    """
+    rng = random.Random(seed)
+    kinds, weights = zip(*KINDS.items())
+    versions = {}
+    deliveries = []
+
+    for number in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        index = rng.randrange(objects)
+        version = versions[kind, index] = versions.get((kind, index), 0) + 1
+        deliveries.append(
+            {
+                "id": f"evt_bench{number}",
+                "object": "event",
+                "type": kind,
+                "api_version": "2024-06-20",
+                "created": 1726300960 + number,
+                "data": {"object": BUILDERS[kind](index, version)},
+                "livemode": False,
+                "pending_webhooks": 1,
+                "request": None,
+            }
+        )
+
+        if deliveries and rng.random() < duplicates:
+            deliveries.append(rng.choice(deliveries))
+        if len(deliveries) > 1 and rng.random() < out_of_order:
+            deliveries[-1], deliveries[-2] = deliveries[-2], deliveries[-1]
+
+    return deliveries
+
+
+class FakeStripeEvents:
+    """
+    Local stand-in for `stripe.Event.retrieve` answering with the generated
+    events after `latency` seconds
+    """
+
+    def __init__(self, events, latency=0):
+        self.events = {event["id"]: event for event in events}
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def retrieve(self, stripe_id, **params):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return json.loads(json.dumps(self.events[stripe_id]))
+
+
+def sign(payload, timestamp):
+    signature = hmac.new(
+        WEBHOOK_SECRET.encode("utf-8"),
+        msg=f"{timestamp}.{payload}".encode("utf-8"),
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class DisableMigrations(dict):
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+class Harness:
+    def __init__(self, deliveries, signed):
+        self.deliveries = deliveries
+        self.signed = signed
+        self.latencies = []
+        self.queries = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def deliver(self, event_data):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            with connection.execute_wrapper(count_query):
+                if self.signed:
+                    payload = json.dumps(event_data)
+                    event_data = StripeWebhook.construct_event(
+                        payload, sign(payload, int(time.time()))
+                    )
+                StripeWebhook.process_webhook(event_data, verified=self.signed)
+        except Exception:
+            failed = True
+        latency = time.perf_counter() - started
+
+        with self.lock:
+            self.latencies.append(latency)
+            self.queries += queries
+            self.errors += failed
+
+    def deliver_all(self, deliveries):
+        try:
+            for event_data in deliveries:
+                self.deliver(event_data)
+        finally:
+            connections.close_all()
+
+    def run(self, concurrency) -> float:
+        started = time.perf_counter()
+        if concurrency <= 1:
+            for event_data in self.deliveries:
+                self.deliver(event_data)
+        else:
+            shards = [self.deliveries[i::concurrency] for i in range(concurrency)]
+            with ThreadPoolExecutor(concurrency) as executor:
+                list(executor.map(self.deliver_all, shards))
+        return time.perf_counter() - started
+
+
+def percentile(values, share):
+    return statistics.quantiles(values, n=100)[share - 1] if len(values) > 1 else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--objects", type=int, default=50)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    parser.add_argument("--out-of-order", type=float, default=0.1)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds of the fake stripe.Event.retrieve",
+    )
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--signed",
+        action="store_true",
+        help="Verify the signatures locally instead of retrieving the events",
+    )
+    args = parser.parse_args()
+
+    deliveries = generate_events(
+        args.events, args.objects, args.duplicates, args.out_of_order
+    )
+    fake = FakeStripeEvents(deliveries, latency=args.latency)
+
+    # naive datetimes of the synced payloads are not what is measured
+    warnings.simplefilter("ignore", RuntimeWarning)
+
+    old_name = connection.settings_dict["NAME"]
+    connection.settings_dict["TEST"]["NAME"] = f"test_{old_name}_benchmark"
+    # the tables are created from the models like `pytest --no-migrations`
+    with override_settings(MIGRATION_MODULES=DisableMigrations()):
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+    try:
+        # the referenced customers and products exist like in production
+        StripeCustomerAction().sync_batch(
+            [make_customer(index, 0) for index in range(args.objects)]
+        )
+        StripeProductAction().sync_batch(
+            [make_product(index, 0) for index in range(args.objects)]
+        )
+
+        harness = Harness(deliveries, args.signed)
+        with override_settings(
+            STRIPE_CONFIG={"WEBHOOK_SECRET": WEBHOOK_SECRET}
+        ), patch.object(stripe.Event, "retrieve", fake.retrieve):
+            elapsed = harness.run(args.concurrency)
+        stored = StripeEvent.objects.count()
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    latencies = [latency * 1000 for latency in harness.latencies]
+    print(f"deliveries:      {len(deliveries)} ({stored} unique events)")
+    print(f"errors:          {harness.errors}")
+    print(f"throughput:      {len(deliveries) / elapsed:8.1f} deliveries/s")
+    print(f"latency p50:     {percentile(latencies, 50):8.2f} ms")
+    print(f"latency p90:     {percentile(latencies, 90):8.2f} ms")
+    print(f"latency p99:     {percentile(latencies, 99):8.2f} ms")
+    print(f"latency max:     {max(latencies):8.2f} ms")
+    print(
+        f"queries:         {harness.queries} ({harness.queries / len(deliveries):.1f}"
+        " per delivery)"
+    )
+    print(f"stripe retrieve: {fake.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
+# Standard Library
+import logging
+
 # Third Party Stuff
 import stripe
+from stripe.error import InvalidRequestError
 
 # Django Stripe Stuff
-from django_stripe.actions.core import StripeCustomer
+from django_stripe.actions.core import StripeCustomer, StripeCustomerAction
 from django_stripe.actions.mixins import (
     StripeSoftDeleteActionMixin,
     StripeSyncActionMixin,
 )
 from django_stripe.models import StripeSubscription
 
+logger = logging.getLogger(__name__)
+
 
 class StripeSubscriptionAction(StripeSyncActionMixin, StripeSoftDeleteActionMixin):
     """
@@ -25,6 +31,9 @@ class StripeSubscriptionAction(StripeSyncActionMixin, StripeSoftDeleteActionMixi
 
     model_class = StripeSubscription
     stripe_object_class = stripe.Subscription
+    # retrieve customers missing locally while syncing a batch,
+    # when disabled the customer of their subscriptions is left empty
+    backfill_missing_customers = True
 
     def pre_set_defualt(self, stripe_data: dict):
         """
@@ -33,3 +42,62 @@ class StripeSubscriptionAction(StripeSyncActionMixin, StripeSoftDeleteActionMixi
         stripe_data["customer"] = StripeCustomer.objects.get(
             stripe_id=stripe_data["customer"]
         )
+
+    def backfill_customers(self, stripe_ids: set) -> set:
+        """
+        Syncs customers which are referenced by subscriptions
+        but do not exist locally
+        Args:
+            stripe_ids: stripe ids of the missing customers
+        Returns:
+            stripe ids of the customers that could be synced,
+            deleted customers are skipped
+        """
+        if not self.backfill_missing_customers:
+            return set()
+
+        stripe_customers = []
+        for stripe_id in stripe_ids:
+            try:
+                stripe_customer = StripeCustomerAction.stripe_object_class.retrieve(
+                    stripe_id
+                )
+            except InvalidRequestError as e:
+                if e.http_status != 404:
+                    raise e
+                continue
+            if not stripe_customer.get("deleted"):
+                stripe_customers.append(stripe_customer)
+
+        synced_ids = {stripe_customer["id"] for stripe_customer in stripe_customers}
+        StripeCustomerAction().sync_batch(stripe_customers)
+        return synced_ids
+
+    def pre_set_default_batch(self, batch: list[dict]):
+        """
+        Checks that the customers of a batch of subscriptions exist with a
+        single query, the customer stripe id is assigned as is to the FK.
+        Missing customers are backfilled with `backfill_customers`.
+        Args:
+            batch: list of data from Stripe API representing subscriptions
+        """
+        customer_ids = {stripe_data["customer"] for stripe_data in batch}
+        existing_customer_ids = set(
+            StripeCustomer.objects.filter(stripe_id__in=customer_ids).values_list(
+                "stripe_id", flat=True
+            )
+        )
+
+        missing_customer_ids = customer_ids - existing_customer_ids
+        if missing_customer_ids:
+            existing_customer_ids |= self.backfill_customers(missing_customer_ids)
+
+        for stripe_data in batch:
+            if stripe_data["customer"] not in existing_customer_ids:
+                logger.warning(
+                    "Stripe customer does not exist for subscription, "
+                    "subscription_id=%s, customer_id=%s",
+                    stripe_data["id"],
+                    stripe_data["customer"],
+                )
+                stripe_data["customer"] = None
@@ -2,6 +2,7 @@
 import stripe
 from django.apps import apps
 from django.conf import settings
+from django.db.models.functions import Lower
 
 # Django Stripe Stuff
 from django_stripe.actions.mixins import (
@@ -25,6 +26,36 @@ class StripeCustomerAction(StripeSyncActionMixin, StripeSoftDeleteActionMixin):
 
     model_class = StripeCustomer
     stripe_object_class = stripe.Customer
+    # match users by email ignoring the case, pair it with an index
+    # on Lower("email") of the user model to keep the lookup cheap
+    case_insensitive_email = False
+
+    def get_users_by_email(self, emails) -> dict:
+        """
+        Returns users with the given emails in a single query
+        Args:
+            emails: emails of the users
+        Returns:
+            dict of email and user, emails are lowercased
+            when `case_insensitive_email` is enabled
+        """
+        user_model_class = apps.get_model(settings.AUTH_USER_MODEL)
+        users = user_model_class.objects.order_by("pk")
+
+        if self.case_insensitive_email:
+            users = users.annotate(email_lower=Lower("email")).filter(
+                email_lower__in={email.lower() for email in emails}
+            )
+        else:
+            users = users.filter(email__in=emails)
+
+        users_by_email = {}
+        for user in users:
+            email = user.email_lower if self.case_insensitive_email else user.email
+            # keep the first user like `.first()` would
+            users_by_email.setdefault(email, user)
+
+        return users_by_email
 
     def post_set_default(self, defaults: dict):
         """
@@ -33,5 +64,23 @@ class StripeCustomerAction(StripeSyncActionMixin, StripeSoftDeleteActionMixin):
             defaults: defaults data
         """
         user_model_class = apps.get_model(settings.AUTH_USER_MODEL)
-        user = user_model_class.objects.filter(email=defaults["email"]).first()
+        lookup = "email__iexact" if self.case_insensitive_email else "email"
+        user = user_model_class.objects.filter(**{lookup: defaults["email"]}).first()
         defaults["user"] = user
+
+    def post_set_default_batch(self, defaults_list: list[dict]):
+        """
+        Sets default values for a batch of stripe data,
+        users of the whole batch are resolved with a single query
+        Args:
+            defaults_list: list of defaults data
+        """
+        users_by_email = self.get_users_by_email(
+            {defaults["email"] for defaults in defaults_list if defaults.get("email")}
+        )
+
+        for defaults in defaults_list:
+            email = defaults.get("email")
+            if email and self.case_insensitive_email:
+                email = email.lower()
+            defaults["user"] = users_by_email.get(email)
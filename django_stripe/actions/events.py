@@ -1,12 +1,36 @@
+# Standard Library
+import json
+import logging
+import time
+from datetime import timedelta
+
 # Third Party Stuff
-from django.core.exceptions import ObjectDoesNotExist
+import stripe
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.db.models import F
 from django.http import Http404
+from django.utils import timezone
 
 # Django Stripe Stuff
-from django_stripe.models import StripeCustomer, StripeEvent
+from django_stripe import metrics
+from django_stripe.instrumentation import count_stage_queries, stage
+from django_stripe.models import (
+    StripeCustomer,
+    StripeEvent,
+    StripeEventSummary,
+    StripeSyncCheckpoint,
+)
+from django_stripe.settings import stripe_settings
+from django_stripe.utils.db import insert_if_absent
+
+logger = logging.getLogger(__name__)
 
 
 class StripeEventAction:
+    # number of events processed between two checkpoint saves
+    checkpoint_interval = 100
+
     @classmethod
     def add(
         cls,
@@ -17,9 +41,16 @@ class StripeEventAction:
         message,
         request=None,
         pending_webhooks=0,
+        validated_message=None,
+        process=True,
     ):
         """
-        Adds and processes an event from a received webhook
+        Adds and processes an event from a received webhook,
+        the event is inserted only if no event with the same stripe id exists
+        in a single statement, duplicates are counted by the
+        `stripe.event.duplicate` metric.
+        Events of kinds without a webhook handler are only persisted with the
+        `all` ingestion policy, see `EVENT_INGESTION`
         Args:
             stripe_id: the stripe id of the event
             kind: the label of the event
@@ -27,8 +58,18 @@ class StripeEventAction:
             message: the data of the webhook
             request_id: the id of the request that initiated the webhook
             pending_webhooks: the number of pending webhooks
+            validated_message: the data of the event when it was fetched from
+                stripe already, the handler won't retrieve it again
+            process: False to only persist the event, it is processed
+                later by a queue worker
+        Returns:
+            the created event, None for a duplicate or a skipped event
         """
-        event = StripeEvent.objects.create(
+        if not cls.should_persist(kind):
+            cls.skip(stripe_id, kind, livemode, message)
+            return None
+
+        event = StripeEvent(
             stripe_id=stripe_id,
             kind=kind,
             livemode=livemode,
@@ -36,25 +77,199 @@ class StripeEventAction:
             api_version=api_version,
             request=request,
             pending_webhooks=pending_webhooks,
+            validated_message=validated_message,
+            # the partition key of a partitioned event table can't be null
+            created=message.get("created") or int(time.time()),
+        )
+
+        with stage("insert", kind):
+            inserted = insert_if_absent(event)
+
+        if not inserted:
+            metrics.increment("stripe.event.duplicate", tags={"kind": kind})
+            return None
+
+        if process:
+            try:
+                cls.process(event)
+            except Exception as e:
+                # a queue worker retries the event
+                cls.record_failure(event, e)
+                raise
+
+        return event
+
+    @classmethod
+    async def aadd(cls, *args, process=True, **kwargs):
+        """
+        Adds an event like `add` from an async view, the insert runs in the
+        thread of the database connection and the event is processed with
+        `aprocess`, which doesn't block the event loop on stripe requests
+        Args:
+            process: False to only persist the event
+            *args, **kwargs: the arguments of `add`
+        Returns:
+            the created event, None for a duplicate or a skipped event
+        """
+        event = await sync_to_async(count_stage_queries(cls.add))(
+            *args, process=False, **kwargs
         )
 
+        if event is not None and process:
+            try:
+                await cls.aprocess(event)
+            except Exception as e:
+                # a queue worker retries the event
+                await sync_to_async(count_stage_queries(cls.record_failure))(event, e)
+                raise
+
+        return event
+
+    @staticmethod
+    def is_handled(kind) -> bool:
+        """
+        Returns True if a webhook handler is registered for the event kind
+        """
         # Django Stripe Stuff
         from django_stripe.webhooks.register import registry
 
-        WebhookClass = registry.get(kind)
+        return registry.get(kind) is not None
+
+    @classmethod
+    def should_persist(cls, kind) -> bool:
+        """
+        Returns True if an event of the kind is persisted with the
+        `EVENT_INGESTION` policy
+        Args:
+            kind: the label of the event
+        Raises:
+            ImproperlyConfigured: if the policy is unknown
+        """
+        policy = stripe_settings.EVENT_INGESTION
+        if policy not in ("all", "handled", "summary"):
+            raise ImproperlyConfigured(
+                f"EVENT_INGESTION must be `all`, `handled` or `summary`, not {policy}"
+            )
+        return policy == "all" or cls.is_handled(kind)
+
+    @staticmethod
+    def skip(stripe_id, kind, livemode, message):
+        """
+        Records an event which is not persisted, counted by the
+        `stripe.event.skipped` metric and in `StripeEventSummary`
+        with the `summary` ingestion policy
+        Args:
+            stripe_id: the stripe id of the event
+            kind: the label of the event
+            livemode: True or False if the webhook was sent from livemode or not
+            message: the data of the webhook
+        """
+        metrics.increment("stripe.event.skipped", tags={"kind": kind})
+        if stripe_settings.EVENT_INGESTION != "summary":
+            return
+
+        values = {
+            "count": F("count") + 1,
+            "last_event_id": stripe_id,
+            "last_event_created": message.get("created"),
+            "updated_at": timezone.now(),
+        }
+        summaries = StripeEventSummary.objects.filter(kind=kind, livemode=livemode)
+        # a single update once the kind has been seen
+        if summaries.update(**values):
+            return
+
+        summary = StripeEventSummary(
+            kind=kind,
+            livemode=livemode,
+            count=1,
+            last_event_id=stripe_id,
+            last_event_created=message.get("created"),
+        )
+        if not insert_if_absent(summary):
+            # inserted concurrently by another request
+            summaries.update(**values)
+
+    @staticmethod
+    def process(event):
+        """
+        Processes an event with the webhook handler registered for its kind
+        Args:
+            event: the django_stripe.stripe.models.Event object to process
+        """
+        # Django Stripe Stuff
+        from django_stripe.webhooks.register import registry
+
+        WebhookClass = registry.get(event.kind)
         if WebhookClass is not None:
             webhook = WebhookClass(event)
             webhook.process()
 
-    def link_customer(self, event):
+    @staticmethod
+    async def aprocess(event):
         """
-        Links a customer referenced in a webhook event message to the event object
+        Processes an event like `process` from an async view
         Args:
-            event: the django_stripe.stripe.models.Event object to link
+            event: the django_stripe.stripe.models.Event object to process
         """
+        # Django Stripe Stuff
+        from django_stripe.webhooks.register import registry
 
+        WebhookClass = registry.get(event.kind)
+        if WebhookClass is not None:
+            webhook = WebhookClass(event)
+            await webhook.aprocess()
+
+    @staticmethod
+    def get_retry_delay(attempts) -> timedelta:
+        """
+        Returns the delay before the next attempt of a failed event,
+        doubled with every attempt up to `WEBHOOK_RETRY_MAX_DELAY`
+        Args:
+            attempts: number of failed attempts so far
+        """
+        seconds = stripe_settings.WEBHOOK_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, stripe_settings.WEBHOOK_RETRY_MAX_DELAY))
+
+    @classmethod
+    def record_failure(cls, event, error):
+        """
+        Records a failed processing attempt of an event and schedules the next
+        attempt, the event is dead lettered after `WEBHOOK_MAX_ATTEMPTS` attempts
+        Args:
+            event: the django_stripe.stripe.models.Event object
+            error: the raised exception
+        """
+        now = timezone.now()
+        event.attempts += 1
+        event.last_error = f"{error.__class__.__name__}: {error}"
+        event.next_attempt_at = now + cls.get_retry_delay(event.attempts)
+        if event.attempts >= stripe_settings.WEBHOOK_MAX_ATTEMPTS:
+            event.dead_lettered_at = now
+            logger.error(
+                "Stripe event dead lettered after %s attempts, event_id=%s",
+                event.attempts,
+                event.stripe_id,
+            )
+        metrics.increment("stripe.event.failed", tags={"kind": event.kind})
+
+        StripeEvent.objects.filter(pk=event.pk).update(
+            attempts=event.attempts,
+            last_error=event.last_error,
+            next_attempt_at=event.next_attempt_at,
+            dead_lettered_at=event.dead_lettered_at,
+            updated_at=now,
+        )
+
+    @staticmethod
+    def get_customer_stripe_id(event):
+        """
+        Returns the stripe id of the customer referenced in an event message
+        Args:
+            event: the django_stripe.stripe.models.Event object
+        """
         if event.kind == "customer.created":
-            return
+            return None
 
         customer_crud_events = [
             "customer.updated",
@@ -62,9 +277,21 @@ class StripeEventAction:
         ]
         event_data_object = event.message["data"]["object"]
         if event.kind in customer_crud_events:
-            stripe_customer_id = event_data_object["id"]
-        else:
-            stripe_customer_id = event_data_object.get("customer", None)
+            return event_data_object["id"]
+        return event_data_object.get("customer", None)
+
+    def link_customer(self, event, save=True):
+        """
+        Links a customer referenced in a webhook event message to the event object
+        Args:
+            event: the django_stripe.stripe.models.Event object to link
+            save: False to leave saving the event to the caller
+        """
+
+        if event.kind == "customer.created":
+            return
+
+        stripe_customer_id = self.get_customer_stripe_id(event)
 
         if stripe_customer_id is not None:
             try:
@@ -75,6 +302,127 @@ class StripeEventAction:
                 )
 
             event.customer = customer
-            event.save()
+            if save:
+                event.save(update_fields=["customer", "updated_at"])
 
         return event
+
+    def link_customers(self, events) -> list:
+        """
+        Links the customers referenced in a batch of events with a single query,
+        the events are not saved
+        Args:
+            events: list of django_stripe.stripe.models.Event objects to link
+        Returns:
+            list of the events whose customer exists or which reference none
+        """
+        stripe_customer_ids = {
+            event: self.get_customer_stripe_id(event) for event in events
+        }
+        customers = StripeCustomer.objects.in_bulk(
+            {stripe_id for stripe_id in stripe_customer_ids.values() if stripe_id},
+            field_name="stripe_id",
+        )
+
+        linked = []
+        for event, stripe_customer_id in stripe_customer_ids.items():
+            if stripe_customer_id is None:
+                linked.append(event)
+            elif stripe_customer_id in customers:
+                event.customer = customers[stripe_customer_id]
+                linked.append(event)
+            else:
+                logger.warning(
+                    "Stripe customer does not exist for event=%s", event.stripe_id
+                )
+
+        return linked
+
+    def process_event(self, event_data) -> bool:
+        """
+        Adds and processes an event fetched from the stripe events list,
+        events which are already recorded are skipped
+        Args:
+            event_data: the stripe event data
+        Returns:
+            True if the event was processed
+        """
+        message = json.loads(json.dumps(dict(event_data), sort_keys=True))
+        event = self.add(
+            stripe_id=message["id"],
+            kind=message["type"],
+            livemode=message["livemode"],
+            api_version=message["api_version"],
+            message=message,
+            request=message["request"],
+            pending_webhooks=message["pending_webhooks"],
+            validated_message=message,
+        )
+        return event is not None
+
+    def sync_incremental(self, name="default", since=None, limit=None) -> int:
+        """
+        Processes the stripe events created since the last run through the
+        registered webhook handlers, instead of re-listing every object.
+        The position is kept in a `StripeSyncCheckpoint` so that an interrupted
+        run resumes from the last processed event.
+
+        The first run without `since` only records the latest event as
+        checkpoint, run `sync_all` once to reconcile everything before it.
+
+        Args:
+            name: name of the checkpoint
+            since: process events created at or after this time (epoch),
+                ignores the saved checkpoint
+            limit: max number of events to process in this run
+        Returns:
+            number of events processed
+        """
+        checkpoint, _ = StripeSyncCheckpoint.objects.get_or_create(name=name)
+
+        if since is not None:
+            # the events list is ordered newest first, only `ending_before`
+            # pages in the other direction so the window is reversed in memory
+            events = list(
+                stripe.Event.auto_paging_iter(created={"gte": since}, limit=100)
+            )
+            events.reverse()
+        elif checkpoint.last_event_id:
+            # pages oldest first from the checkpoint
+            events = stripe.Event.auto_paging_iter(
+                ending_before=checkpoint.last_event_id, limit=100
+            )
+        else:
+            latest = stripe.Event.list(limit=1).data
+            if latest:
+                checkpoint.last_event_id = latest[0]["id"]
+                checkpoint.last_event_created = latest[0]["created"]
+                checkpoint.save()
+            return 0
+
+        count = 0
+        try:
+            for event_data in events:
+                if limit is not None and count >= limit:
+                    break
+
+                try:
+                    self.process_event(event_data)
+                except Exception:
+                    # a failing handler must not block the following events,
+                    # the event stays recorded with processed=False
+                    logger.exception(
+                        "Error occurred while processing stripe event, " "event_id=%s",
+                        event_data["id"],
+                    )
+
+                checkpoint.last_event_id = event_data["id"]
+                checkpoint.last_event_created = event_data["created"]
+                count += 1
+
+                if count % self.checkpoint_interval == 0:
+                    checkpoint.save()
+        finally:
+            checkpoint.save()
+
+        return count
@@ -1,8 +1,56 @@
+# Standard Library
+import logging
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import partial
+
 # Third Party Stuff
+from django.db import connections, models, router, transaction
 from django.utils import timezone
+from stripe.error import InvalidRequestError
 
 # Django Stripe Stuff
-from django_stripe.utils import convert_epoch
+from django_stripe.utils import convert_epoch, stripe_fingerprint
+from django_stripe.utils.db import (
+    bulk_conditional_upsert,
+    conditional_upsert,
+    insert_if_absent,
+    supports_conditional_upsert,
+)
+from django_stripe.utils.pipeline import (
+    STRIPE_EPOCH,
+    RateLimiter,
+    SyncPipeline,
+    split_created_windows,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _convert_noop(value):
+    return value
+
+
+def _convert_datetime(value):
+    return convert_epoch(value) if value else None
+
+
+def _convert_text(value):
+    return value or ""
+
+
+def _convert_decimal(value):
+    return Decimal(str(value)) if value is not None else None
+
+
+def _convert_related(to_attname, value):
+    # raw stripe id of the related object is assigned to the FK column as is
+    if isinstance(value, models.Model):
+        return getattr(value, to_attname)
+    return value
 
 
 class StripeSoftDeleteActionMixin:
@@ -58,6 +106,19 @@ class StripeSyncActionMixin:
     model_class = None
     stripe_object_class = None
     batch_size = 1000
+    streaming_sync = False
+    fetch_workers = 1
+    fetch_queue_size = 8
+    # threads retrieving the objects of `sync_by_ids`, and the max number
+    # of retrieve requests they send per second, None for no limit
+    retrieve_workers = 8
+    requests_per_second = 20
+    # write batches with INSERT ... ON CONFLICT DO UPDATE when the database
+    # supports it, falls back to SELECT + bulk_update + bulk_create
+    use_upsert = False
+    # store a fingerprint of the stripe data and skip
+    # writing objects whose fingerprint did not change
+    skip_unchanged = False
 
     def pre_set_defualt(self, stripe_data: dict):
         """
@@ -69,31 +130,87 @@ class StripeSyncActionMixin:
         """
         pass
 
+    def pre_set_default_batch(self, batch: list[dict]):
+        """
+        Override this method to set values in every stripe_data of a batch
+        before setting the defaults, e.g. to resolve related objects with
+        a single query instead of one query per object.
+        Called by `sync_batch` instead of `pre_set_defualt`.
+        Args:
+            batch: list of data from Stripe API
+        """
+        for stripe_data in batch:
+            self.pre_set_defualt(stripe_data)
+
     def post_set_default(self, defaults: dict):
         """
         Override this method to perform actions after setting the default.
         """
         pass
 
-    def set_default(self, stripe_data: dict):
-        defaults = {}
+    def post_set_default_batch(self, defaults_list: list[dict]):
+        """
+        Override this method to perform actions after setting the defaults
+        of every object of a batch, e.g. to resolve related objects with
+        a single query instead of one query per object.
+        Called by `sync_batch` instead of `post_set_default`.
+        Args:
+            defaults_list: list of defaults data
+        """
+        for defaults in defaults_list:
+            self.post_set_default(defaults)
+
+    def compile_field_plan(self) -> list[tuple]:
+        """
+        Builds the conversion plan of stripe data into model field values.
+        Override it to customize how a field is converted.
+        Returns:
+            list of (stripe data key, model attribute, converter) tuples
+        """
+        plan = []
 
-        for field in self.model_class._meta.get_fields():
-            if field.name not in stripe_data:
+        for field in self.model_class._meta.concrete_fields:
+            if field.primary_key:
                 continue
 
             field_type = field.get_internal_type()
 
-            if field_type == "DateTimeField":
-                defaults[field.name] = (
-                    convert_epoch(stripe_data[field.name])
-                    if stripe_data[field.name]
-                    else None
+            if field.many_to_one:
+                plan.append(
+                    (
+                        field.name,
+                        field.attname,
+                        partial(_convert_related, field.target_field.attname),
+                    )
                 )
+            elif field_type == "DateTimeField":
+                plan.append((field.name, field.attname, _convert_datetime))
             elif field_type in ["CharField", "TextField"]:
-                defaults[field.name] = stripe_data[field.name] or ""
+                plan.append((field.name, field.attname, _convert_text))
+            elif field_type == "DecimalField":
+                plan.append((field.name, field.attname, _convert_decimal))
             else:
-                defaults[field.name] = stripe_data[field.name]
+                plan.append((field.name, field.attname, _convert_noop))
+
+        return plan
+
+    def get_field_plan(self) -> list[tuple]:
+        """
+        Returns the conversion plan of the model,
+        compiled once and cached on the action class
+        """
+        cached = self.__class__.__dict__.get("_field_plan")
+        if cached is None or cached[0] is not self.model_class:
+            cached = (self.model_class, self.compile_field_plan())
+            setattr(self.__class__, "_field_plan", cached)
+        return cached[1]
+
+    def set_default(self, stripe_data: dict):
+        defaults = {}
+
+        for key, attname, convert in self.get_field_plan():
+            if key in stripe_data:
+                defaults[attname] = convert(stripe_data[key])
 
         return defaults
 
@@ -103,11 +220,21 @@ class StripeSyncActionMixin:
         Args:
             stripe_data: data from Stripe API
         """
+        fingerprint = None
+        if self.skip_unchanged:
+            fingerprint = stripe_fingerprint(stripe_data)
+            model_obj = self.model_class.objects.filter(
+                stripe_id=stripe_data["id"], stripe_fingerprint=fingerprint
+            ).first()
+            if model_obj:
+                return model_obj
 
         self.pre_set_defualt(stripe_data)
         stripe_id = stripe_data.pop("id")
         defaults = self.set_default(stripe_data)
         self.post_set_default(defaults)
+        if fingerprint:
+            defaults["stripe_fingerprint"] = fingerprint
 
         model_obj, _ = self.model_class.objects.update_or_create(
             stripe_id=stripe_id, defaults=defaults
@@ -115,99 +242,633 @@ class StripeSyncActionMixin:
 
         return model_obj
 
-    def sync_by_ids(self, stripe_ids):
+    def sync_if_newer(self, stripe_data: dict, event_created: int) -> bool:
         """
-        Synchronizes a local data from the Stripe API
+        Synchronizes the object data of a stripe event unless a newer event
+        was applied already. The object is inserted or updated with a single
+        `INSERT ... ON CONFLICT DO UPDATE ... WHERE` statement comparing the
+        `last_event_created` watermark, so concurrent events of the same
+        object can't lose the newer state and a stale event is a no-op.
+        Databases without support of the statement update the row with the
+        watermark in the WHERE clause and insert it when it is missing.
+        With `skip_unchanged` an object whose fingerprint matches is not
+        written either.
+        Args:
+            stripe_data: object data of the stripe event
+            event_created: time at which the event was created (epoch)
+        Returns:
+            True if the object was written, False for a stale or unchanged event
+        """
+        fingerprint = None
+        if self.skip_unchanged:
+            fingerprint = stripe_fingerprint(stripe_data)
+
+        self.pre_set_defualt(stripe_data)
+        stripe_id = stripe_data.pop("id")
+        defaults = self.set_default(stripe_data)
+        self.post_set_default(defaults)
+        defaults["last_event_created"] = event_created
+        if fingerprint:
+            defaults["stripe_fingerprint"] = fingerprint
+
+        model_obj = self.model_class(stripe_id=stripe_id, **defaults)
+        using = router.db_for_write(self.model_class)
+
+        if supports_conditional_upsert(using):
+            return conditional_upsert(
+                model_obj,
+                "stripe_id",
+                [*defaults, "updated_at"],
+                self._newer_condition(using, defaults),
+                using=using,
+            )
+
+        def update():
+            model_objs = self.model_class.objects.filter(stripe_id=stripe_id).filter(
+                models.Q(last_event_created__isnull=True)
+                | models.Q(last_event_created__lte=event_created)
+            )
+            if fingerprint:
+                model_objs = model_objs.exclude(stripe_fingerprint=fingerprint)
+            return model_objs.update(updated_at=timezone.now(), **defaults)
+
+        if update() or insert_if_absent(model_obj, using=using):
+            return True
+        # inserted concurrently by an event of the same object
+        return bool(update())
+
+    def _newer_condition(self, using, fields) -> str:
+        """
+        Returns the SQL condition of a conditional upsert that only updates
+        a row whose `last_event_created` watermark is not newer and, with
+        `skip_unchanged`, whose fingerprint changed
+        Args:
+            using: database alias
+            fields: names of the written fields
+        """
+        quote_name = connections[using].ops.quote_name
+        table = quote_name(self.model_class._meta.db_table)
+        conditions = []
+        if "last_event_created" in fields:
+            column = quote_name(
+                self.model_class._meta.get_field("last_event_created").column
+            )
+            conditions.append(
+                f"({table}.{column} IS NULL OR {table}.{column} <= EXCLUDED.{column})"
+            )
+        if "stripe_fingerprint" in fields:
+            column = quote_name(
+                self.model_class._meta.get_field("stripe_fingerprint").column
+            )
+            conditions.append(f"{table}.{column} IS DISTINCT FROM EXCLUDED.{column}")
+        return " AND ".join(conditions)
+
+    def retrieve_by_ids(self, stripe_ids) -> tuple:
+        """
+        Retrieves objects from the Stripe API on `retrieve_workers` threads,
+        at most `requests_per_second` requests are sent per second
         Args:
             stripe_ids: list of stripe ids
+        Returns:
+            tuple of the list of retrieved objects and the list of stripe ids
+            which don't exist in stripe
         """
-        for stripe_id in stripe_ids:
-            stripe_data = self.stripe_object_class.retrieve(stripe_id)
-            self.sync(stripe_data)
+        limiter = RateLimiter(self.requests_per_second)
+
+        def retrieve(stripe_id):
+            limiter.wait()
+            try:
+                return self.stripe_object_class.retrieve(stripe_id)
+            except InvalidRequestError as e:
+                if e.http_status != 404:
+                    raise e
+                return None
+
+        workers = max(min(self.retrieve_workers, len(stripe_ids)), 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(retrieve, stripe_ids))
+
+        stripe_objects, missing_ids = [], []
+        for stripe_id, stripe_object in zip(stripe_ids, results):
+            if stripe_object is None:
+                missing_ids.append(stripe_id)
+            else:
+                stripe_objects.append(stripe_object)
+        return stripe_objects, missing_ids
+
+    def sync_by_ids(self, stripe_ids) -> list:
+        """
+        Synchronizes a local data from the Stripe API, the objects are retrieved
+        concurrently with `retrieve_by_ids` and written with `sync_batch`
+        Args:
+            stripe_ids: list of stripe ids
+        Returns:
+            list of the stripe ids which don't exist in stripe
+        """
+        stripe_ids = list(dict.fromkeys(stripe_ids))
+        missing_ids = []
+
+        for start in range(0, len(stripe_ids), self.batch_size):
+            end = start + self.batch_size
+            stripe_objects, missing = self.retrieve_by_ids(stripe_ids[start:end])
+            if stripe_objects:
+                self.sync_batch(stripe_objects)
+            missing_ids.extend(missing)
+
+        if missing_ids:
+            logger.warning("Stripe objects do not exist, stripe_ids=%s", missing_ids)
+        return missing_ids
 
     def _update_model_objs(
-        self, model_objs: list[object], stripe_id_obj_map: dict[str, dict]
+        self,
+        model_objs: list[object],
+        stripe_id_obj_map: dict[str, dict],
+        extra_defaults: dict[str, dict],
     ):
         """
         Updates model objects
         Args:
             model_objs: list of model objects
             stripe_id_obj_map: dict of stripe id and stripe object data to be updated
+            extra_defaults: dict of stripe id and extra values to set on the objects
         """
         if not model_objs:
             return
 
-        for model_obj in model_objs:
-            stripe_id = model_obj.stripe_id
-            data = stripe_id_obj_map[stripe_id]
+        defaults_list = [
+            self.set_default(stripe_id_obj_map.pop(model_obj.stripe_id))
+            for model_obj in model_objs
+        ]
+        self.post_set_default_batch(defaults_list)
 
-            self.pre_set_defualt(data)
-            defaults = self.set_default(data)
-            self.post_set_default(defaults)
+        fields = set()
+        for model_obj, defaults in zip(model_objs, defaults_list):
+            defaults.update(extra_defaults.get(model_obj.stripe_id, {}))
+            fields.update(defaults.keys())
 
             for key, value in defaults.items():
                 setattr(model_obj, key, value)
 
-            del stripe_id_obj_map[stripe_id]
+        self.model_class.objects.bulk_update(model_objs, fields=sorted(fields))
 
-        self.model_class.objects.bulk_update(model_objs, fields=list(defaults.keys()))
+    def _build_defaults_list(
+        self, stripe_id_obj_map: dict[str, dict], extra_defaults: dict[str, dict]
+    ) -> list[dict]:
+        """
+        Builds the defaults of new model objects
+        Args:
+            stripe_id_obj_map: dict of stripe id and stripe object data
+            extra_defaults: dict of stripe id and extra values to set on the objects
+        """
+        defaults_list = []
+
+        for stripe_id, data in stripe_id_obj_map.items():
+            defaults = self.set_default(data)
+            defaults["stripe_id"] = stripe_id
+            defaults_list.append(defaults)
+
+        self.post_set_default_batch(defaults_list)
+
+        for defaults in defaults_list:
+            defaults.update(extra_defaults.get(defaults["stripe_id"], {}))
 
-    def _create_model_objs(self, stripe_id_obj_map: dict[str, dict]):
+        return defaults_list
+
+    def _create_model_objs(
+        self, stripe_id_obj_map: dict[str, dict], extra_defaults: dict[str, dict]
+    ):
         """
         Creates model objects
         Args:
             stripe_id_obj_map: dict of stripe id and stripe object data to be created
+            extra_defaults: dict of stripe id and extra values to set on the objects
         """
         if not stripe_id_obj_map:
             return
 
-        model_objs = []
+        defaults_list = self._build_defaults_list(stripe_id_obj_map, extra_defaults)
+        self.model_class.objects.bulk_create(
+            [self.model_class(**defaults) for defaults in defaults_list]
+        )
 
-        for stripe_id, data in stripe_id_obj_map.items():
-            self.pre_set_defualt(data)
-            defaults = self.set_default(data)
-            defaults["stripe_id"] = stripe_id
-            self.post_set_default(defaults)
+    def _upsert_model_objs(
+        self,
+        stripe_id_obj_map: dict[str, dict],
+        extra_defaults: dict[str, dict],
+        if_newer: bool = False,
+    ) -> set:
+        """
+        Creates or updates model objects with an
+        INSERT ... ON CONFLICT (stripe_id) DO UPDATE statement per set of
+        fields, so that a field missing in the data of an object (e.g. of a
+        deleted object) keeps its stored value
+        Args:
+            stripe_id_obj_map: dict of stripe id and stripe object data
+            extra_defaults: dict of stripe id and extra values to set on the objects
+            if_newer: only update rows whose watermark is not newer and, with
+                `skip_unchanged`, whose fingerprint changed, see `sync_if_newer`
+        Returns:
+            stripe ids of the written objects
+        """
+        if not stripe_id_obj_map:
+            return set()
+
+        defaults_list = self._build_defaults_list(stripe_id_obj_map, extra_defaults)
+        using = router.db_for_write(self.model_class)
+
+        groups = defaultdict(list)
+        for defaults in defaults_list:
+            groups[frozenset(defaults)].append(defaults)
+
+        written_ids = set()
+        for fields, group in groups.items():
+            model_objs = [self.model_class(**defaults) for defaults in group]
+            update_fields = sorted((fields - {"stripe_id"}) | {"updated_at"})
+            if if_newer:
+                written_ids |= bulk_conditional_upsert(
+                    model_objs,
+                    "stripe_id",
+                    update_fields,
+                    self._newer_condition(using, fields),
+                    using=using,
+                )
+                continue
+
+            self.model_class.objects.bulk_create(
+                model_objs,
+                update_conflicts=True,
+                unique_fields=["stripe_id"],
+                update_fields=update_fields,
+            )
+            written_ids.update(defaults["stripe_id"] for defaults in group)
+        return written_ids
+
+    def _pop_unchanged(
+        self,
+        existing_fingerprints: dict[str, str],
+        stripe_id_obj_map: dict[str, dict],
+        extra_defaults: dict[str, dict],
+        sync_generation: uuid.UUID = None,
+    ) -> set:
+        """
+        Removes the objects whose fingerprint did not change from the batch
+        Args:
+            existing_fingerprints: dict of stripe id and stored fingerprint
+            stripe_id_obj_map: dict of stripe id and stripe object data
+            extra_defaults: dict of stripe id and extra values to set on the objects
+            sync_generation: generation of the running sync to stamp on the objects
+        Returns:
+            stripe ids of the unchanged objects
+        """
+        unchanged_ids = {
+            stripe_id
+            for stripe_id, fingerprint in existing_fingerprints.items()
+            if fingerprint
+            and fingerprint == extra_defaults[stripe_id]["stripe_fingerprint"]
+        }
+        for stripe_id in unchanged_ids:
+            del stripe_id_obj_map[stripe_id]
+
+        if unchanged_ids and sync_generation:
+            # unchanged objects still need to be marked as seen by this sync
+            self.model_class.objects.filter(stripe_id__in=unchanged_ids).update(
+                sync_generation=sync_generation
+            )
 
-            model_objs.append(self.model_class(**defaults))
+        return unchanged_ids
 
-        self.model_class.objects.bulk_create(model_objs)
+    def _pop_stale(
+        self,
+        existing_watermarks: dict[str, int],
+        stripe_id_obj_map: dict[str, dict],
+        events_created: dict[str, int],
+    ) -> set:
+        """
+        Removes the objects whose stored watermark is newer than their event
+        Args:
+            existing_watermarks: dict of stripe id and stored `last_event_created`
+            stripe_id_obj_map: dict of stripe id and stripe object data
+            events_created: dict of stripe id and time of the event of the object
+        Returns:
+            stripe ids of the stale objects
+        """
+        stale_ids = {
+            stripe_id
+            for stripe_id, watermark in existing_watermarks.items()
+            if watermark is not None
+            and stripe_id in events_created
+            and watermark > events_created[stripe_id]
+        }
+        for stripe_id in stale_ids:
+            del stripe_id_obj_map[stripe_id]
+
+        return stale_ids
+
+    def can_upsert(self) -> bool:
+        """
+        Returns True if `sync_batch` can use a native upsert
+        for the database of the model
+        """
+        connection = connections[router.db_for_write(self.model_class)]
+        return self.use_upsert and getattr(
+            connection.features, "supports_update_conflicts_with_target", False
+        )
 
-    def sync_batch(self, batch: list[dict]):
+    def sync_batch(
+        self,
+        batch: list[dict],
+        sync_generation: uuid.UUID = None,
+        events_created: dict[str, int] = None,
+    ) -> dict[str, int]:
         """
         Synchronizes a batch of data from the Stripe API
         Args:
             batch: list of data from Stripe API
+            sync_generation: generation of the running sync to stamp on the objects
+            events_created: dict of stripe id and time of the stripe event the
+                object data comes from, objects whose stored `last_event_created`
+                is newer are skipped
+        Returns:
+            number of `written` objects and of `skipped` unchanged or stale objects
         """
+        events_created = events_created or {}
+        extra_defaults = {}
+        for data in batch:
+            extra = extra_defaults[data["id"]] = {}
+            if sync_generation:
+                extra["sync_generation"] = sync_generation
+            if self.skip_unchanged:
+                extra["stripe_fingerprint"] = stripe_fingerprint(data)
+            if data["id"] in events_created:
+                extra["last_event_created"] = events_created[data["id"]]
+
+        self.pre_set_default_batch(batch)
+
         stripe_id_obj_map = {}
         for data in batch:
             stripe_id = data.pop("id")
             stripe_id_obj_map[stripe_id] = data
 
+        using = router.db_for_write(self.model_class)
+        if events_created and supports_conditional_upsert(using):
+            # compare and set in a single statement, see `sync_if_newer`
+            written_ids = self._upsert_model_objs(
+                stripe_id_obj_map, extra_defaults, if_newer=True
+            )
+            skipped_ids = stripe_id_obj_map.keys() - written_ids
+            if skipped_ids and sync_generation:
+                self.model_class.objects.filter(stripe_id__in=skipped_ids).update(
+                    sync_generation=sync_generation
+                )
+            return {"written": len(written_ids), "skipped": len(skipped_ids)}
+
+        if events_created:
+            # lock the rows so that their watermark can't change until written
+            with transaction.atomic(using=using):
+                return self._sync_existing(
+                    stripe_id_obj_map, extra_defaults, sync_generation, events_created
+                )
+        return self._sync_existing(
+            stripe_id_obj_map, extra_defaults, sync_generation, events_created
+        )
+
+    def _sync_existing(
+        self,
+        stripe_id_obj_map: dict[str, dict],
+        extra_defaults: dict[str, dict],
+        sync_generation: uuid.UUID,
+        events_created: dict[str, int],
+    ) -> dict[str, int]:
+        """
+        Writes a batch after selecting the existing objects, with `use_upsert`
+        only their fingerprints are selected and the batch is upserted
+        Args:
+            stripe_id_obj_map: dict of stripe id and stripe object data
+            extra_defaults: dict of stripe id and extra values to set on the objects
+            sync_generation: generation of the running sync to stamp on the objects
+            events_created: dict of stripe id and time of the event of the object
+        Returns:
+            number of `written` objects and of `skipped` unchanged or stale objects
+        """
+        unchanged_ids = set()
+        stale_ids = set()
+
         model_objs = self.model_class.objects.filter(
             stripe_id__in=stripe_id_obj_map.keys()
         )
-        self._update_model_objs(model_objs, stripe_id_obj_map)
-        self._create_model_objs(stripe_id_obj_map)
+        if events_created:
+            model_objs = model_objs.select_for_update()
+
+        if self.can_upsert():
+            existing = {}
+            if self.skip_unchanged or events_created:
+                existing = {
+                    row[0]: row[1:]
+                    for row in model_objs.values_list(
+                        "stripe_id", "stripe_fingerprint", "last_event_created"
+                    )
+                }
+
+            if events_created:
+                stale_ids = self._pop_stale(
+                    {stripe_id: row[1] for stripe_id, row in existing.items()},
+                    stripe_id_obj_map,
+                    events_created,
+                )
+            if self.skip_unchanged:
+                unchanged_ids = self._pop_unchanged(
+                    {
+                        stripe_id: row[0]
+                        for stripe_id, row in existing.items()
+                        if stripe_id in stripe_id_obj_map
+                    },
+                    stripe_id_obj_map,
+                    extra_defaults,
+                    sync_generation,
+                )
+            self._upsert_model_objs(stripe_id_obj_map, extra_defaults)
+            return {
+                "written": len(stripe_id_obj_map),
+                "skipped": len(unchanged_ids) + len(stale_ids),
+            }
+
+        model_objs = list(model_objs)
+        if events_created:
+            stale_ids = self._pop_stale(
+                {
+                    model_obj.stripe_id: model_obj.last_event_created
+                    for model_obj in model_objs
+                },
+                stripe_id_obj_map,
+                events_created,
+            )
+            model_objs = [
+                model_obj
+                for model_obj in model_objs
+                if model_obj.stripe_id not in stale_ids
+            ]
+        if self.skip_unchanged:
+            unchanged_ids = self._pop_unchanged(
+                {
+                    model_obj.stripe_id: model_obj.stripe_fingerprint
+                    for model_obj in model_objs
+                },
+                stripe_id_obj_map,
+                extra_defaults,
+                sync_generation,
+            )
+            model_objs = [
+                model_obj
+                for model_obj in model_objs
+                if model_obj.stripe_id not in unchanged_ids
+            ]
+
+        written = len(stripe_id_obj_map)
+        self._update_model_objs(model_objs, stripe_id_obj_map, extra_defaults)
+        self._create_model_objs(stripe_id_obj_map, extra_defaults)
+        return {"written": written, "skipped": len(unchanged_ids) + len(stale_ids)}
+
+    def iter_batches(self, **params):
+        """
+        Lists objects from the Stripe API and yields them in batches of `batch_size`
+        Args:
+            params: filters passed to the Stripe list API
+        """
+        batch = []
 
-    def sync_all(self):
+        for obj in self.stripe_object_class.auto_paging_iter(**params):
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def sync_all(self, streaming: bool = None, workers: int = None):
         """
         Synchronizes all data from the Stripe API
+        Args:
+            streaming: use the constant memory streaming sync,
+                defaults to `streaming_sync` of the action class
+            workers: number of threads listing objects from the Stripe API,
+                defaults to `fetch_workers` of the action class
         """
+        if streaming is None:
+            streaming = self.streaming_sync
+        if workers is None:
+            workers = self.fetch_workers
+
+        if workers > 1:
+            return self.sync_all_concurrent(workers=workers)
+
+        if streaming:
+            return self.sync_all_streaming()
+
         objects = self.stripe_object_class.auto_paging_iter()
         stripe_ids = []
         batch = []
+        totals = Counter()
 
         for i, obj in enumerate(objects):
             stripe_ids.append(obj["id"])
             batch.append(obj)
             if (i + 1) % self.batch_size == 0:
-                self.sync_batch(batch)
+                totals.update(self.sync_batch(batch))
                 batch = []
 
-        self.sync_batch(batch)
+        totals.update(self.sync_batch(batch))
 
         # sync deleted objects
         self.model_class.objects.exclude(stripe_id__in=stripe_ids).update(
             deleted_at=timezone.now()
         )
+        self.log_sync_totals(totals)
+
+    def log_sync_totals(self, totals: Counter):
+        """
+        Reports the number of written and skipped objects of a sync
+        Args:
+            totals: sum of the results of `sync_batch`
+        """
+        logger.info(
+            "Synced %s objects, written=%s, skipped=%s",
+            self.model_class.__name__,
+            totals["written"],
+            totals["skipped"],
+        )
+
+    def soft_delete_stale(self, sync_generation: uuid.UUID):
+        """
+        Soft deletes objects which were not touched by the given sync generation
+        Args:
+            sync_generation: generation of the finished sync
+        """
+        return (
+            self.model_class.objects.filter(deleted_at__isnull=True)
+            .exclude(sync_generation=sync_generation)
+            .update(deleted_at=timezone.now())
+        )
+
+    def sync_all_streaming(self):
+        """
+        Synchronizes all data from the Stripe API without holding every stripe id
+        in memory. Each synced object is stamped with the generation of this run
+        and objects left with a stale generation are soft deleted at the end.
+        """
+        sync_generation = uuid.uuid4()
+        totals = Counter()
+
+        for batch in self.iter_batches():
+            totals.update(self.sync_batch(batch, sync_generation=sync_generation))
+
+        # sync deleted objects
+        self.soft_delete_stale(sync_generation)
+        self.log_sync_totals(totals)
+
+        return sync_generation
+
+    def sync_all_concurrent(
+        self,
+        workers: int = 4,
+        windows: int = None,
+        created_gte: int = STRIPE_EPOCH,
+    ):
+        """
+        Synchronizes all data from the Stripe API with a pipelined sync.
+        The listing is split into `created` time windows which are fetched in
+        parallel on a thread pool, while the fetched batches are written to the
+        database in the calling thread. Deleted objects are detected the same
+        way as in `sync_all_streaming`.
+        Args:
+            workers: number of threads listing objects from the Stripe API
+            windows: number of `created` time windows, defaults to 4 per worker
+            created_gte: start of the `created` time windows, older objects
+                are listed by the first window
+        """
+        sync_generation = uuid.uuid4()
+        totals = Counter()
+        created_windows = split_created_windows(
+            created_gte, int(time.time()), windows or workers * 4
+        )
+
+        def write(batch):
+            totals.update(self.sync_batch(batch, sync_generation=sync_generation))
+
+        pipeline = SyncPipeline(
+            writer=write,
+            workers=workers,
+            queue_size=self.fetch_queue_size,
+        )
+        pipeline.run(
+            [
+                partial(self.iter_batches, created=created, limit=100)
+                for created in created_windows
+            ]
+        )
+
+        # sync deleted objects
+        self.soft_delete_stale(sync_generation)
+        self.log_sync_totals(totals)
+
+        return sync_generation
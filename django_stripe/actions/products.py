@@ -1,3 +1,6 @@
+# Standard Library
+import logging
+
 # Third Party Stuff
 import stripe
 
@@ -8,6 +11,8 @@ from django_stripe.actions.mixins import (
 )
 from django_stripe.models import StripeCoupon, StripePrice, StripeProduct
 
+logger = logging.getLogger(__name__)
+
 
 class StripeProductAction(StripeSyncActionMixin, StripeSoftDeleteActionMixin):
     """
@@ -49,6 +54,48 @@ class StripePriceAction(StripeSyncActionMixin, StripeSoftDeleteActionMixin):
 
         stripe_data["product"] = product
 
+    def pre_set_default_batch(self, batch: list[dict]):
+        """
+        Sync products that do not exist yet for a batch of prices.
+        Products are resolved with a single query, the missing ones are listed
+        from Stripe by ids and created in bulk before the prices are written.
+        Prices whose product doesn't exist in Stripe either are logged and
+        written without a product.
+        Args:
+            batch: list of data from Stripe API representing prices
+        """
+        product_ids = {stripe_data["product"] for stripe_data in batch}
+        products = self.product_model_class.objects.in_bulk(
+            product_ids, field_name="stripe_id"
+        )
+
+        missing_product_ids = list(product_ids - products.keys())
+        if missing_product_ids:
+            stripe_products = []
+            for start in range(0, len(missing_product_ids), 100):
+                end = start + 100
+                stripe_products.extend(
+                    self.stripe_product_class.auto_paging_iter(
+                        ids=missing_product_ids[start:end], limit=100
+                    )
+                )
+            StripeProductAction().sync_batch(stripe_products)
+            products.update(
+                self.product_model_class.objects.in_bulk(
+                    missing_product_ids, field_name="stripe_id"
+                )
+            )
+
+        for stripe_data in batch:
+            if stripe_data["product"] not in products:
+                logger.warning(
+                    "Stripe product does not exist for price, "
+                    "price_id=%s, product_id=%s",
+                    stripe_data["id"],
+                    stripe_data["product"],
+                )
+            stripe_data["product"] = products.get(stripe_data["product"])
+
 
 class StripeCouponAction(StripeSoftDeleteActionMixin, StripeSyncActionMixin):
     model_class = StripeCoupon
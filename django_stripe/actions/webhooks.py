@@ -1,13 +1,18 @@
 # Standard Library
+import json
 import logging
+from contextlib import contextmanager
 
 # Third Party Stuff
+import stripe
+from asgiref.sync import sync_to_async
 from django.utils.encoding import smart_str
 from stripe.error import InvalidRequestError
 
 # Django Stripe Stuff
 from django_stripe.actions import StripeEventAction
-from django_stripe.models import StripeEvent
+from django_stripe.instrumentation import count_stage_queries, stage
+from django_stripe.settings import stripe_settings
 
 logger = logging.getLogger(__name__)
 
@@ -39,30 +44,120 @@ class StripeWebhook:
     """
 
     @classmethod
-    def process_webhook(cls, event_data):
-        event = StripeEvent.objects.filter(stripe_id=event_data["id"]).first()
+    def construct_event(cls, payload, signature) -> dict:
+        """
+        Verifies the Stripe-Signature header of a webhook locally with the
+        `WEBHOOK_SECRET` endpoint secret and returns the event data
+        Args:
+            payload: the raw body of the webhook request
+            signature: the value of the Stripe-Signature header
+        Raises:
+            stripe.error.SignatureVerificationError: if the signature is invalid
+                or older than `WEBHOOK_TOLERANCE` seconds
+        """
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
 
-        if event:
-            logger.info(
-                "Found duplicate stripe event record with event_id=%s", event.id
+        stripe.WebhookSignature.verify_header(
+            payload,
+            signature,
+            stripe_settings.WEBHOOK_SECRET,
+            stripe_settings.WEBHOOK_TOLERANCE,
+        )
+        return json.loads(payload)
+
+    @classmethod
+    def process_webhook(cls, event_data, verified=False):
+        """
+        Adds and processes the event of a webhook, duplicates are skipped
+        and counted by the `stripe.event.duplicate` metric.
+        The stages are timed with `WEBHOOK_INSTRUMENTATION`
+        Args:
+            event_data: the data of the webhook
+            verified: True if the signature of the webhook was verified,
+                the signed data is used as validated message instead of
+                retrieving the event, except for `WEBHOOK_RETRIEVE_KINDS`
+        """
+        with cls.webhook_stage(event_data):
+            event = StripeEventAction.add(**cls.get_event_kwargs(event_data, verified))
+            cls.enqueue(event)
+
+    @classmethod
+    async def aprocess_webhook(cls, event_data, verified=False):
+        """
+        Adds and processes the event of a webhook like `process_webhook`
+        from an async view, stripe is requested with the async client
+        of stripe-python which requires `httpx` or `aiohttp`
+        Args:
+            event_data: the data of the webhook
+            verified: True if the signature of the webhook was verified
+        """
+        with cls.webhook_stage(event_data):
+            event = await StripeEventAction.aadd(
+                **cls.get_event_kwargs(event_data, verified)
             )
+            await sync_to_async(count_stage_queries(cls.enqueue))(event)
+
+    @classmethod
+    @contextmanager
+    def webhook_stage(cls, event_data):
+        """
+        Times the `webhook` stage of an event, an invalid request to stripe
+        is logged and the webhook ignored
+        Args:
+            event_data: the data of the webhook
+        """
+        with stage("webhook", event_data["type"]):
+            try:
+                yield
+            except InvalidRequestError as e:
+                event_id = event_data["id"]
+                logger.info(
+                    "Error occurred while processing stripe webhook, "
+                    f"event_id={event_id}, error={smart_str(e)}"
+                )
+
+    @classmethod
+    def get_event_kwargs(cls, event_data, verified) -> dict:
+        """
+        Returns the arguments of `StripeEventAction.add` for the event of
+        a webhook, the event is only persisted when a queue worker processes
+        the events
+        Args:
+            event_data: the data of the webhook
+            verified: True if the signature of the webhook was verified
+        """
+        validated_message = None
+        if (
+            verified
+            and event_data["type"] not in stripe_settings.WEBHOOK_RETRIEVE_KINDS
+        ):
+            validated_message = event_data
+
+        return {
+            "stripe_id": event_data["id"],
+            "kind": event_data["type"],
+            "livemode": event_data["livemode"],
+            "message": event_data,
+            "api_version": event_data["api_version"],
+            "request": event_data["request"],
+            "pending_webhooks": event_data["pending_webhooks"],
+            "validated_message": validated_message,
+            "process": not stripe_settings.WEBHOOK_ENQUEUE,
+        }
+
+    @classmethod
+    def enqueue(cls, event):
+        """
+        Hands a persisted event over to the queue backend with `WEBHOOK_ENQUEUE`
+        Args:
+            event: the created event, None for a duplicate or a skipped event
+        """
+        if event is None or not stripe_settings.WEBHOOK_ENQUEUE:
             return
 
-        try:
-            # create an event and process webhook
-            StripeEventAction.add(
-                stripe_id=event_data["id"],
-                kind=event_data["type"],
-                livemode=event_data["livemode"],
-                message=event_data,
-                api_version=event_data["api_version"],
-                request=event_data["request"],
-                pending_webhooks=event_data["pending_webhooks"],
-            )
-        except InvalidRequestError as e:
-            event_id = event_data["id"]
-            logger.info(
-                "Error occurred while processing stripe webhook, "
-                f"event_id={event_id}, error={smart_str(e)}"
-            )
-        return
+        # Django Stripe Stuff
+        from django_stripe.webhooks.queues import get_queue_backend
+
+        with stage("enqueue", event.kind):
+            get_queue_backend().enqueue(event)
@@ -41,8 +41,12 @@ class AbstractStripeModelAdmin(admin.ModelAdmin):
         obj = self.get_object(request, object_id)
         if obj:
             if self.stripe_model_action:
-                self.stripe_model_action.sync_by_ids([obj.stripe_id])
-                messages.success(request, "Object synced with Stripe successfully.")
+                if self.stripe_model_action.sync_by_ids([obj.stripe_id]):
+                    messages.warning(
+                        request, "Object not found in stripe: %s" % obj.stripe_id
+                    )
+                else:
+                    messages.success(request, "Object synced with Stripe successfully.")
             else:
                 messages.error(request, "Stripe model action not defined.")
         else:
@@ -57,9 +61,13 @@ class AbstractStripeModelAdmin(admin.ModelAdmin):
 
     @admin.action(description="Sync from stripe")
     def sync(self, request, queryset):
-        self.stripe_model_action.sync_by_ids(
+        missing_ids = self.stripe_model_action.sync_by_ids(
             queryset.values_list("stripe_id", flat=True)
         )
+        if missing_ids:
+            messages.warning(
+                request, "Objects not found in stripe: %s" % ", ".join(missing_ids)
+            )
 
     def sync_all(self, request):
         if self.stripe_model_action is not None:
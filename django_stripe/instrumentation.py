@@ -0,0 +1,169 @@
+# Standard Library
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Third Party Stuff
+import stripe
+from django.db import connections, router
+from django.dispatch import Signal
+
+# Django Stripe Stuff
+from django_stripe import metrics
+from django_stripe.settings import stripe_settings
+
+# sent after every timed stage with the `stage`, `kind`, `seconds`,
+# `queries` and `stripe_requests` arguments
+stage_completed = Signal()
+
+_local = threading.local()
+
+# query counters of the stages active in the current context, shared with
+# the threads of `sync_to_async` which run in a copy of the context
+_active_counters = ContextVar("django_stripe_stage_counters", default=())
+
+
+def get_stripe_requests() -> int:
+    """
+    Returns the number of stripe requests sent by the current thread
+    """
+    return getattr(_local, "stripe_requests", 0)
+
+
+class CountingHTTPClient:
+    """
+    Wraps the http client of stripe-python to count the requests
+    sent by every thread
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def count(self):
+        _local.stripe_requests = get_stripe_requests() + 1
+
+    def request_with_retries(self, *args, **kwargs):
+        self.count()
+        return self.client.request_with_retries(*args, **kwargs)
+
+    def request_stream_with_retries(self, *args, **kwargs):
+        self.count()
+        return self.client.request_stream_with_retries(*args, **kwargs)
+
+    async def request_with_retries_async(self, *args, **kwargs):
+        self.count()
+        return await self.client.request_with_retries_async(*args, **kwargs)
+
+    async def request_stream_with_retries_async(self, *args, **kwargs):
+        self.count()
+        return await self.client.request_stream_with_retries_async(*args, **kwargs)
+
+
+def install_stripe_counter():
+    """
+    Wraps `stripe.default_http_client` with a `CountingHTTPClient`,
+    the default client is created like stripe-python does when it isn't set
+    """
+    if isinstance(stripe.default_http_client, CountingHTTPClient):
+        return
+
+    client = stripe.default_http_client
+    if client is None:
+        # Third Party Stuff
+        from stripe._http_client import new_http_client_async_fallback
+
+        options = {"verify_ssl_certs": stripe.verify_ssl_certs, "proxy": stripe.proxy}
+        client = stripe.new_default_http_client(
+            async_fallback_client=new_http_client_async_fallback(**options),
+            **options,
+        )
+    stripe.default_http_client = CountingHTTPClient(client)
+
+
+def _get_connection():
+    # Django Stripe Stuff
+    from django_stripe.models import StripeEvent
+
+    return connections[router.db_for_write(StripeEvent)]
+
+
+def count_stage_queries(func):
+    """
+    Wraps a function called with `sync_to_async` within a stage so that its
+    SQL queries, which run on the connection of another thread, are counted
+    by the stages active in the caller
+    Args:
+        func: the sync function
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        counters = _active_counters.get()
+        if not counters:
+            return func(*args, **kwargs)
+
+        def count_query(execute, sql, params, many, context):
+            for counter in counters:
+                counter["queries"] += 1
+            return execute(sql, params, many, context)
+
+        with _get_connection().execute_wrapper(count_query):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name: str, kind: str = None):
+    """
+    Times a stage of the webhook pipeline when `WEBHOOK_INSTRUMENTATION`
+    is enabled, and reports its duration, number of SQL queries and number
+    of stripe requests to the metrics backend as
+    `stripe.webhook.<stage>.seconds|queries|stripe_requests` tagged by kind,
+    and with the `stage_completed` signal
+    Args:
+        name: name of the stage
+        kind: the label of the event
+    """
+    if not stripe_settings.WEBHOOK_INSTRUMENTATION:
+        yield
+        return
+
+    install_stripe_counter()
+    counter = {"queries": 0}
+
+    def count_query(execute, sql, params, many, context):
+        counter["queries"] += 1
+        return execute(sql, params, many, context)
+
+    token = _active_counters.set((*_active_counters.get(), counter))
+    stripe_requests = get_stripe_requests()
+    started = time.perf_counter()
+    try:
+        with _get_connection().execute_wrapper(count_query):
+            yield
+    finally:
+        seconds = time.perf_counter() - started
+        _active_counters.reset(token)
+        queries = counter["queries"]
+        stripe_requests = get_stripe_requests() - stripe_requests
+        tags = {"kind": kind} if kind else None
+
+        metrics.timing(f"stripe.webhook.{name}.seconds", seconds, tags=tags)
+        metrics.increment(f"stripe.webhook.{name}.queries", queries, tags=tags)
+        metrics.increment(
+            f"stripe.webhook.{name}.stripe_requests", stripe_requests, tags=tags
+        )
+        stage_completed.send(
+            sender=None,
+            stage=name,
+            kind=kind,
+            seconds=seconds,
+            queries=queries,
+            stripe_requests=stripe_requests,
+        )
@@ -0,0 +1,60 @@
+# Standard Library
+import logging
+
+# Third Party Stuff
+from django.core.management import BaseCommand
+
+# Django Stripe Stuff
+from django_stripe.models import StripeEvent
+from django_stripe.settings import stripe_settings
+from django_stripe.utils.partitions import MonthlyPartitions
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Drop the monthly partitions of the stripe event table older than the
+    retention window, archiving them first into `<partition>.jsonl.gz` files
+    when an archive directory is set
+
+    command: python manage.py archive_stripe_events --retention-months 12
+    """
+
+    help = "Archive and drop expired stripe event partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=stripe_settings.EVENT_RETENTION_MONTHS,
+            help="Number of past months to keep besides the current one",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=stripe_settings.EVENT_ARCHIVE_DIR,
+            help="Directory to archive the partitions to before dropping them",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the expired partitions",
+        )
+
+    def handle(self, *args, **options):
+        partitions = MonthlyPartitions(StripeEvent)
+        if not partitions.is_partitioned():
+            logger.info("Stripe event table is not partitioned")
+            return
+
+        if options["dry_run"]:
+            for name, _ in partitions.get_expired_partitions(
+                options["retention_months"]
+            ):
+                self.stdout.write(f"{name}\n")
+            return
+
+        dropped = partitions.drop_expired(
+            options["retention_months"], archive_dir=options["archive_dir"] or None
+        )
+        logger.info("Dropped stripe event partitions=%s", dropped)
@@ -0,0 +1,38 @@
+# Standard Library
+import logging
+
+# Third Party Stuff
+from django.core.management import BaseCommand
+
+# Django Stripe Stuff
+from django_stripe.models import StripeEvent
+from django_stripe.utils.partitions import MonthlyPartitions
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Convert the stripe event table into a table partitioned by month (PostgreSQL),
+    or create the upcoming monthly partitions if it is partitioned already.
+    Run it monthly so that new events never land in the default partition.
+
+    command: python manage.py partition_stripe_events --months-ahead 3
+    """
+
+    help = "Partition the stripe event table by month"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Number of monthly partitions to create ahead of the current month",
+        )
+
+    def handle(self, *args, **options):
+        partitions = MonthlyPartitions(StripeEvent)
+        partitions.partition(months_ahead=options["months_ahead"])
+        logger.info(
+            "Partitioned stripe events, partitions=%s", len(partitions.get_partitions())
+        )
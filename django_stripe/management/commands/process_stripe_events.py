@@ -0,0 +1,79 @@
+# Standard Library
+import logging
+import multiprocessing
+
+# Third Party Stuff
+from django.core.management import BaseCommand
+from django.db import connections
+
+# Django Stripe Stuff
+from django_stripe.webhooks.queues import get_queue_backend
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Process the stripe events enqueued by the webhook view
+    (`WEBHOOK_ENQUEUE`) with the configured queue backend
+
+    command: python manage.py process_stripe_events --processes 4
+    """
+
+    help = "Process enqueued stripe events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Max number of events claimed at once by a worker",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1,
+            help="Seconds to wait when the queue is drained",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop once the queue is drained",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_queue_backend()
+        worker_options = {
+            "batch_size": options["batch_size"],
+            "poll_interval": options["poll_interval"],
+            "once": options["once"],
+        }
+
+        if options["processes"] <= 1:
+            backend.run_worker(**worker_options)
+            return
+
+        # every process has to open its own database connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=backend.run_worker, kwargs=worker_options)
+            for _ in range(options["processes"])
+        ]
+
+        for worker in workers:
+            worker.start()
+        logger.info("Started %s stripe event workers", len(workers))
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
@@ -0,0 +1,108 @@
+# Standard Library
+import logging
+from argparse import ArgumentTypeError
+
+# Third Party Stuff
+from django.core.management import BaseCommand
+
+# Django Stripe Stuff
+from django_stripe.webhooks.replay import EventReplay
+
+logger = logging.getLogger(__name__)
+
+
+def boolean(value: str) -> bool:
+    if value.lower() in ("true", "yes", "1"):
+        return True
+    if value.lower() in ("false", "no", "0"):
+        return False
+    raise ArgumentTypeError(f"Expected true or false, got {value}")
+
+
+class Command(BaseCommand):
+    """
+    Re-run the registered webhook handlers of stored stripe events,
+    e.g. after fixing a handler or registering a new one
+
+    command: python manage.py replay_stripe_events --kind product.updated --processes 4
+    """
+
+    help = "Replay stored stripe events through the registered webhook handlers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            action="append",
+            dest="kinds",
+            help="Kind of the events to replay, can be repeated, "
+            "defaults to every registered kind",
+        )
+        parser.add_argument(
+            "--since",
+            type=int,
+            default=None,
+            help="Replay events created at or after this epoch",
+        )
+        parser.add_argument(
+            "--until",
+            type=int,
+            default=None,
+            help="Replay events created before this epoch",
+        )
+        parser.add_argument(
+            "--processed",
+            type=boolean,
+            default=None,
+            help="Only replay processed (true) or unprocessed (false) events",
+        )
+        parser.add_argument(
+            "--valid",
+            type=boolean,
+            default=None,
+            help="Only replay valid (true) or invalid (false) events",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EventReplay.chunk_size,
+            help="Number of events replayed at once by a worker",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the selected events",
+        )
+
+    def progress(self, done, total, elapsed):
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(f"Replayed {done}/{total} events ({rate:.1f} events/s)\n")
+
+    def handle(self, *args, **options):
+        replay = EventReplay(
+            kinds=options["kinds"],
+            since=options["since"],
+            until=options["until"],
+            processed=options["processed"],
+            valid=options["valid"],
+        )
+        replay.chunk_size = options["chunk_size"]
+
+        result = replay.replay(
+            processes=options["processes"],
+            dry_run=options["dry_run"],
+            progress=self.progress,
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{result['selected']} events would be replayed\n")
+            return
+
+        logger.info(
+            "Replayed %s stripe events, %s failed", result["replayed"], result["failed"]
+        )
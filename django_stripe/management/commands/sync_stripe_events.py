@@ -0,0 +1,54 @@
+# Standard Library
+import logging
+
+# Third Party Stuff
+import stripe
+from django.core.management import BaseCommand
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Incrementally sync objects from the stripe events created since the last run,
+    the position is saved in a named checkpoint so an interrupted run resumes
+
+    command: python manage.py sync_stripe_events --checkpoint nightly
+    """
+
+    help = "Sync changes from stripe events since the last checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--checkpoint",
+            default="default",
+            help="Name of the checkpoint to resume from",
+        )
+        parser.add_argument(
+            "--since",
+            type=int,
+            default=None,
+            help="Process events created at or after this epoch, "
+            "ignoring the saved checkpoint",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Max number of events to process in this run",
+        )
+
+    def handle(self, *args, **options):
+        if not stripe.api_key:
+            logger.info("Stripe API key not set while syncing events")
+            return
+
+        count = StripeEventAction().sync_incremental(
+            name=options["checkpoint"],
+            since=options["since"],
+            limit=options["limit"],
+        )
+        logger.info("Synced %s stripe events", count)
@@ -0,0 +1,99 @@
+# Standard Library
+import logging
+from collections import Counter, defaultdict, deque
+
+# Django Stripe Stuff
+from django_stripe.settings import stripe_settings
+
+logger = logging.getLogger(__name__)
+
+_backends = {}
+
+
+class BaseMetricsBackend:
+    """
+    Base class of the metrics backends, set `METRICS_BACKEND` to the
+    import path of a subclass to forward the metrics e.g. to statsd.
+    """
+
+    def increment(self, name: str, value: int = 1, tags: dict = None):
+        """
+        Increments a counter
+        Args:
+            name: name of the counter
+            value: value to add
+            tags: extra dimensions of the counter, e.g. the event kind
+        """
+        raise NotImplementedError
+
+    def timing(self, name: str, seconds: float, tags: dict = None):
+        """
+        Records a duration, ignored unless implemented by the backend
+        Args:
+            name: name of the timer
+            seconds: measured duration
+            tags: extra dimensions of the timer, e.g. the event kind
+        """
+
+
+class CounterMetricsBackend(BaseMetricsBackend):
+    """
+    Keeps the counters in memory of the current process
+
+    Example:
+        from django_stripe.metrics import get_metrics_backend
+        get_metrics_backend().get("stripe.event.duplicate")
+    """
+
+    # number of durations kept per timer
+    max_timings = 1000
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = defaultdict(lambda: deque(maxlen=self.max_timings))
+
+    def increment(self, name: str, value: int = 1, tags: dict = None):
+        self.counters[name] += value
+        for key, tag in (tags or {}).items():
+            self.counters[f"{name}.{key}.{tag}"] += value
+
+    def timing(self, name: str, seconds: float, tags: dict = None):
+        self.timings[name].append(seconds)
+        for key, tag in (tags or {}).items():
+            self.timings[f"{name}.{key}.{tag}"].append(seconds)
+
+    def get(self, name: str) -> int:
+        return self.counters[name]
+
+    def get_timings(self, name: str) -> list:
+        return list(self.timings[name])
+
+
+class LoggingMetricsBackend(BaseMetricsBackend):
+    """
+    Logs every metric to the `django_stripe.metrics` logger
+    """
+
+    def increment(self, name: str, value: int = 1, tags: dict = None):
+        logger.info("metric=%s value=%s tags=%s", name, value, tags or {})
+
+    def timing(self, name: str, seconds: float, tags: dict = None):
+        logger.info("metric=%s seconds=%.6f tags=%s", name, seconds, tags or {})
+
+
+def get_metrics_backend():
+    """
+    Returns the shared instance of the backend set in `METRICS_BACKEND`
+    """
+    backend_class = stripe_settings.METRICS_BACKEND
+    if backend_class not in _backends:
+        _backends[backend_class] = backend_class()
+    return _backends[backend_class]
+
+
+def increment(name: str, value: int = 1, tags: dict = None):
+    get_metrics_backend().increment(name, value, tags)
+
+
+def timing(name: str, seconds: float, tags: dict = None):
+    get_metrics_backend().timing(name, seconds, tags)
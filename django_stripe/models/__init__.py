@@ -1,5 +1,10 @@
 from django_stripe.models.billings import StripeSubscription
-from django_stripe.models.core import StripeCustomer, StripeEvent
+from django_stripe.models.core import (
+    StripeCustomer,
+    StripeEvent,
+    StripeEventSummary,
+    StripeSyncCheckpoint,
+)
 from django_stripe.models.payment_methods import StripeCard
 from django_stripe.models.products import StripeCoupon, StripePrice, StripeProduct
 
@@ -7,6 +12,8 @@ __all__ = (
     "StripeSubscription",
     "StripeCustomer",
     "StripeEvent",
+    "StripeEventSummary",
+    "StripeSyncCheckpoint",
     "StripeCard",
     "StripeProduct",
     "StripePrice",
@@ -1,4 +1,13 @@
+from django_stripe.models.abstracts.core.checkpoints import (
+    AbstractStripeSyncCheckpoint,
+)
 from django_stripe.models.abstracts.core.customers import AbstractStripeCustomer
 from django_stripe.models.abstracts.core.events import AbstractStripeEvent
+from django_stripe.models.abstracts.core.summaries import AbstractStripeEventSummary
 
-__all__ = ("AbstractStripeCustomer", "AbstractStripeEvent")
+__all__ = (
+    "AbstractStripeCustomer",
+    "AbstractStripeEvent",
+    "AbstractStripeEventSummary",
+    "AbstractStripeSyncCheckpoint",
+)
@@ -0,0 +1,26 @@
+# Third Party Stuff
+from django.db import models
+
+# Django Stripe Stuff
+from django_stripe.models.abstracts.mixins import TimeStampedUUIDModel
+
+
+class AbstractStripeSyncCheckpoint(TimeStampedUUIDModel):
+    """
+    Keeps the position of an incremental sync in the stripe events list,
+    so that the next run resumes from the last processed event.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    last_event_id = models.CharField(max_length=255, null=True, blank=True)
+    last_event_created = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Time at which the last processed event was created (epoch).",
+    )
+
+    def __str__(self):
+        return "{} - {}".format(self.name, self.last_event_id)
+
+    class Meta:
+        abstract = True
@@ -3,12 +3,21 @@ from django.db import models
 
 # Django Stripe Stuff
 from django_stripe.models.abstracts.mixins import AbstractStripeModel
+from django_stripe.models.fields import CompressedJSONField, PayloadJSONField
+from django_stripe.settings import stripe_settings
 
 
 class AbstractStripeEvent(AbstractStripeModel):
     kind = models.CharField(max_length=255)
-    webhook_message = models.JSONField()
-    validated_message = models.JSONField(null=True, blank=True)
+    if stripe_settings.EVENT_PAYLOAD_STORAGE == "compressed":
+        # the payload is stored once, the validated copy as a diff of it
+        webhook_message = CompressedJSONField()
+        validated_message = CompressedJSONField(
+            null=True, blank=True, diff_against="webhook_message"
+        )
+    else:
+        webhook_message = PayloadJSONField()
+        validated_message = PayloadJSONField(null=True, blank=True)
     valid = models.BooleanField(null=True)
     processed = models.BooleanField(default=False)
     request = models.JSONField(
@@ -28,6 +37,20 @@ class AbstractStripeEvent(AbstractStripeModel):
         ),
     )
     api_version = models.CharField(max_length=128, blank=True)
+    created = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text=(
+            "Time at which the event was created. "
+            "Measured in seconds since the Unix epoch"
+        ),
+    )
+    # failed processing attempts, retried with an exponential backoff
+    attempts = models.PositiveIntegerField(default=0, editable=False)
+    last_error = models.TextField(null=True, blank=True, editable=False)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # set once the event failed `WEBHOOK_MAX_ATTEMPTS` times, it isn't retried
+    dead_lettered_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     @property
     def message(self):
@@ -38,3 +61,12 @@ class AbstractStripeEvent(AbstractStripeModel):
 
     class Meta:
         abstract = True
+        indexes = [
+            # keeps the lookup of the due events cheap, processed events
+            # are left out of the index
+            models.Index(
+                fields=["next_attempt_at"],
+                name="%(app_label)s_%(class)s_due",
+                condition=models.Q(processed=False),
+            )
+        ]
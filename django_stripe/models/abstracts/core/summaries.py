@@ -0,0 +1,29 @@
+# Third Party Stuff
+from django.db import models
+
+# Django Stripe Stuff
+from django_stripe.models.abstracts.mixins import TimeStampedUUIDModel
+
+
+class AbstractStripeEventSummary(TimeStampedUUIDModel):
+    """
+    Counts the received events of a kind which were not persisted
+    because no webhook handler is registered for it.
+    """
+
+    kind = models.CharField(max_length=255)
+    livemode = models.BooleanField(default=False)
+    count = models.PositiveBigIntegerField(default=0)
+    last_event_id = models.CharField(max_length=255, null=True, blank=True)
+    last_event_created = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Time at which the last counted event was created (epoch).",
+    )
+
+    def __str__(self):
+        return "{} - {}".format(self.kind, self.count)
+
+    class Meta:
+        abstract = True
+        unique_together = ("kind", "livemode")
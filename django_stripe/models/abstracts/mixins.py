@@ -57,5 +57,17 @@ class AbstractStripeModel(TimeStampedUUIDModel):
     # Soft delete product in DB on deletion from stripe
     deleted_at = models.DateTimeField(null=True, editable=False)
 
+    # Stamped by a streaming `sync_all` run on every row it touches,
+    # rows with a stale generation are soft deleted at the end of the run
+    sync_generation = models.UUIDField(null=True, blank=True, editable=False)
+
+    # Hash of the stripe data last written, used to skip unchanged writes
+    stripe_fingerprint = models.CharField(
+        max_length=64, null=True, blank=True, editable=False
+    )
+
+    # Time of the last stripe event applied to the row, older events are skipped
+    last_event_created = models.BigIntegerField(null=True, blank=True, editable=False)
+
     class Meta:
         abstract = True
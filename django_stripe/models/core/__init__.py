@@ -1,4 +1,11 @@
+from django_stripe.models.core.checkpoints import StripeSyncCheckpoint
 from django_stripe.models.core.customers import StripeCustomer
 from django_stripe.models.core.events import StripeEvent
+from django_stripe.models.core.summaries import StripeEventSummary
 
-__all__ = ("StripeCustomer", "StripeEvent")
+__all__ = (
+    "StripeCustomer",
+    "StripeEvent",
+    "StripeEventSummary",
+    "StripeSyncCheckpoint",
+)
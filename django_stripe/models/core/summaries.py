@@ -0,0 +1,6 @@
+# Django Stripe Stuff
+from django_stripe.models.abstracts.core import AbstractStripeEventSummary
+
+
+class StripeEventSummary(AbstractStripeEventSummary):
+    pass
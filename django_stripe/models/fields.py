@@ -0,0 +1,116 @@
+# Standard Library
+import json
+
+# Third Party Stuff
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# Django Stripe Stuff
+from django_stripe.settings import stripe_settings
+from django_stripe.utils.payloads import pack_payload, unpack_payload
+
+
+class PackedPayload(bytes):
+    """Compressed value loaded from the database, unpacked on first access"""
+
+
+def storage_mismatch(field, stored: str) -> ImproperlyConfigured:
+    return ImproperlyConfigured(
+        f"{field.model.__name__}.{field.name} is stored as {stored} but "
+        f"EVENT_PAYLOAD_STORAGE is `{stripe_settings.EVENT_PAYLOAD_STORAGE}`, "
+        "migrate the payload columns after switching the storage"
+    )
+
+
+class PayloadJSONField(models.JSONField):
+    """
+    JSON field of the event payloads with the `json` storage, fails when the
+    column still holds compressed payloads
+    """
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        return name, "django.db.models.JSONField", args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            raise storage_mismatch(self, "compressed binary")
+        return super().from_db_value(value, expression, connection)
+
+
+class CompressedJSONDescriptor(DeferredAttribute):
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        value = super().__get__(instance, cls)
+        if isinstance(value, PackedPayload):
+            value = self.field.unpack(instance, value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # a data descriptor, otherwise the loaded value shadows `__get__`
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    Stores a JSON value compressed with the `EVENT_PAYLOAD_CODEC` codec
+    in a binary column. The value is decompressed lazily on first access.
+
+    With `diff_against` only the difference to the value of the other field
+    is stored, e.g. an almost identical copy of the same document.
+    """
+
+    descriptor_class = CompressedJSONDescriptor
+
+    def __init__(self, *args, diff_against: str = None, **kwargs):
+        self.diff_against = diff_against
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.diff_against:
+            kwargs["diff_against"] = self.diff_against
+        return name, path, args, kwargs
+
+    def unpack(self, instance, value: bytes):
+        return unpack_payload(
+            value, get_base=lambda: getattr(instance, self.diff_against)
+        )
+
+    def pre_save(self, model_instance, add):
+        value = model_instance.__dict__.get(self.attname)
+        if value is None or isinstance(value, PackedPayload):
+            # unchanged since loaded, no need to compress it again
+            return value
+
+        base = None
+        if self.diff_against:
+            base = getattr(model_instance, self.diff_against)
+        return PackedPayload(
+            pack_payload(value, stripe_settings.EVENT_PAYLOAD_CODEC, base=base)
+        )
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, PackedPayload):
+            return value
+        # saved without its instance (e.g. `bulk_update`), stored in full
+        return PackedPayload(pack_payload(value, stripe_settings.EVENT_PAYLOAD_CODEC))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise storage_mismatch(self, "JSON")
+        return PackedPayload(value)
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
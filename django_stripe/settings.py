@@ -10,9 +10,38 @@ DEFAULTS = {
     "STRIPE_SITE": "django_stripe.sites.StripeAdminSite",
     "API_VERSION": "",
     "API_KEY": "",
+    # persist webhook events and leave the processing to a queue worker
+    "WEBHOOK_ENQUEUE": False,
+    "WEBHOOK_QUEUE_BACKEND": "django_stripe.webhooks.queues.DatabaseQueueBackend",
+    # failed events are retried after WEBHOOK_RETRY_DELAY * 2 ** (attempts - 1)
+    # seconds, capped at WEBHOOK_RETRY_MAX_DELAY, and dead lettered after
+    # WEBHOOK_MAX_ATTEMPTS attempts
+    "WEBHOOK_MAX_ATTEMPTS": 8,
+    "WEBHOOK_RETRY_DELAY": 60,
+    "WEBHOOK_RETRY_MAX_DELAY": 6 * 60 * 60,
+    # verify the Stripe-Signature header locally instead of retrieving the event
+    "WEBHOOK_SECRET": "",
+    "WEBHOOK_TOLERANCE": 300,
+    # kinds still retrieved from stripe when the signature is verified
+    "WEBHOOK_RETRIEVE_KINDS": [],
+    # `all` persists every event, `handled` only the kinds with a registered
+    # webhook handler, `summary` counts the others in `StripeEventSummary`
+    "EVENT_INGESTION": "all",
+    # time the stages of the webhook pipeline, see `django_stripe.instrumentation`
+    "WEBHOOK_INSTRUMENTATION": False,
+    "METRICS_BACKEND": "django_stripe.metrics.CounterMetricsBackend",
+    # partitions of the event table older than this are dropped
+    "EVENT_RETENTION_MONTHS": 12,
+    # directory the dropped partitions are archived to, empty to not archive
+    "EVENT_ARCHIVE_DIR": "",
+    # `json` or `compressed` to store the event payloads compressed,
+    # the validated copy as a diff of the webhook payload
+    "EVENT_PAYLOAD_STORAGE": "json",
+    # `zlib` or `zstd` (requires the zstandard package)
+    "EVENT_PAYLOAD_CODEC": "zlib",
 }
 
-IMPORT_STRINGS = []
+IMPORT_STRINGS = ["WEBHOOK_QUEUE_BACKEND", "METRICS_BACKEND"]
 
 
 def perform_import(val, setting_name):
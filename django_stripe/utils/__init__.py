@@ -4,12 +4,14 @@ from django_stripe.utils.utils import (
     ZERO_DECIMAL_CURRENCIES,
     convert_amount_for_db,
     convert_epoch,
+    stripe_fingerprint,
 )
 
 __all__ = [
     "Currency",
     "convert_epoch",
     "convert_amount_for_db",
+    "stripe_fingerprint",
     "ZERO_DECIMAL_CURRENCIES",
     "CURRENCY_SYMBOLS",
 ]
@@ -0,0 +1,185 @@
+# Third Party Stuff
+from django.db import IntegrityError, connections, router, transaction
+
+try:
+    from django.db.models.constants import OnConflict
+except ImportError:  # Django < 4.1
+    OnConflict = None
+
+
+def insert_if_absent(obj, using=None) -> bool:
+    """
+    Inserts the object unless a row conflicting on any of its unique
+    constraints exists, with a single
+    `INSERT ... ON CONFLICT DO NOTHING RETURNING` statement.
+    Databases without `RETURNING` support and Django < 4.1 fall back to
+    an insert in a savepoint that ignores the integrity error.
+    Args:
+        obj: unsaved model instance
+        using: database alias, defaults to the router's write database
+    Returns:
+        True if the object was inserted, False if it already existed
+    """
+    model_class = obj.__class__
+    using = using or router.db_for_write(model_class, instance=obj)
+    connection = connections[using]
+
+    if not (
+        OnConflict is not None
+        and connection.features.supports_ignore_conflicts
+        and connection.features.can_return_columns_from_insert
+    ):
+        try:
+            with transaction.atomic(using=using):
+                obj.save(force_insert=True, using=using)
+        except IntegrityError:
+            return False
+        return True
+
+    rows = _insert_returning([obj], using, OnConflict.IGNORE)
+    if not rows:
+        return False
+    _set_inserted(obj, using, rows[0])
+    return True
+
+
+def supports_conditional_upsert(using) -> bool:
+    """
+    Returns True if `conditional_upsert` is supported by the database
+    Args:
+        using: database alias
+    """
+    features = connections[using].features
+    return (
+        OnConflict is not None
+        and getattr(features, "supports_update_conflicts_with_target", False)
+        and features.can_return_columns_from_insert
+    )
+
+
+def conditional_upsert(
+    obj, unique_field: str, update_fields: list, condition: str, using=None
+) -> bool:
+    """
+    Inserts the object, or updates the `update_fields` of the row conflicting
+    on `unique_field` when `condition` holds, with a single
+    `INSERT ... ON CONFLICT DO UPDATE SET ... WHERE ... RETURNING` statement.
+    Check `supports_conditional_upsert` first.
+    Args:
+        obj: unsaved model instance
+        unique_field: name of the unique field of the conflict
+        update_fields: names of the fields updated on a conflict
+        condition: SQL condition of the update, the stored row is referenced
+            by the quoted table name and the new values by `EXCLUDED`
+        using: database alias, defaults to the router's write database
+    Returns:
+        True if the object was inserted or updated, False otherwise
+    """
+    using = using or router.db_for_write(obj.__class__, instance=obj)
+
+    return bool(
+        bulk_conditional_upsert(
+            [obj], unique_field, update_fields, condition, using=using
+        )
+    )
+
+
+def bulk_conditional_upsert(
+    objs: list, unique_field: str, update_fields: list, condition: str, using=None
+) -> set:
+    """
+    Multi-row `conditional_upsert`, the objects are inserted or updated with
+    a single `INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE SET ...
+    WHERE ... RETURNING` statement. Check `supports_conditional_upsert` first.
+    Args:
+        objs: unsaved model instances of the same model
+        unique_field: name of the unique field of the conflict
+        update_fields: names of the fields updated on a conflict
+        condition: SQL condition of the update, the stored row is referenced
+            by the quoted table name and the new values by `EXCLUDED`
+        using: database alias, defaults to the router's write database
+    Returns:
+        values of the `unique_field` of the inserted or updated objects
+    """
+    if not objs:
+        return set()
+
+    opts = objs[0].__class__._meta
+    using = using or router.db_for_write(objs[0].__class__)
+    unique = opts.get_field(unique_field)
+
+    rows = _insert_returning(
+        objs,
+        using,
+        OnConflict.UPDATE,
+        update_fields=[opts.get_field(name).column for name in update_fields],
+        unique_fields=[unique.column],
+        condition=condition,
+        returning_fields=[opts.pk, unique],
+    )
+
+    written = set()
+    objs_by_unique = {getattr(obj, unique.attname): obj for obj in objs}
+    for row in rows:
+        _set_inserted(objs_by_unique[row[1]], using, row)
+        written.add(row[1])
+    return written
+
+
+def _insert_returning(
+    objs,
+    using,
+    on_conflict,
+    update_fields=None,
+    unique_fields=None,
+    condition=None,
+    returning_fields=None,
+):
+    """
+    Inserts the objects with an `INSERT ... ON CONFLICT ... RETURNING` statement
+    Returns:
+        list of the returned rows, the primary key first by default
+    """
+    opts = objs[0].__class__._meta
+    connection = connections[using]
+    fields = [field for field in opts.concrete_fields if field is not opts.auto_field]
+    returning_fields = returning_fields or [opts.pk]
+    values = [
+        field.get_db_prep_save(field.pre_save(obj, True), connection=connection)
+        for obj in objs
+        for field in fields
+    ]
+    placeholders = "(%s)" % ", ".join(["%s"] * len(fields))
+
+    suffix_sql = connection.ops.on_conflict_suffix_sql(
+        fields, on_conflict, update_fields, unique_fields
+    )
+    if condition:
+        suffix_sql = f"{suffix_sql} WHERE {condition}"
+
+    quote_name = connection.ops.quote_name
+    sql = "%s %s (%s) VALUES %s %s RETURNING %s" % (
+        connection.ops.insert_statement(on_conflict=on_conflict),
+        quote_name(opts.db_table),
+        ", ".join(quote_name(field.column) for field in fields),
+        ", ".join([placeholders] * len(objs)),
+        suffix_sql,
+        ", ".join(quote_name(field.column) for field in returning_fields),
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+        rows = cursor.fetchall()
+
+    return rows
+
+
+def _set_inserted(obj, using, row):
+    """
+    Marks the object as saved with the primary key of its returned row
+    """
+    opts = obj.__class__._meta
+    if opts.auto_field is not None:
+        obj.pk = row[0]
+    obj._state.adding = False
+    obj._state.db = using
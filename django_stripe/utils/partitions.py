@@ -0,0 +1,294 @@
+# Standard Library
+import gzip
+import os
+import re
+from datetime import datetime, timezone
+
+# Third Party Stuff
+from django.db import connections, router, transaction
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """
+    Returns the first day of the month `count` months after `month`
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def month_start(epoch: int) -> datetime:
+    """
+    Returns the first day of the month of the epoch
+    """
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+class MonthlyPartitions:
+    """
+    Manages the native PostgreSQL range partitioning by month of a model table
+    on an epoch column. Partitions are named `<table>_pYYYYMM`, rows outside
+    of every partition go to the `<table>_default` partition.
+
+    Example:
+        from django_stripe.models import StripeEvent
+        partitions = MonthlyPartitions(StripeEvent)
+        partitions.partition()
+        partitions.drop_expired(retention_months=12, archive_dir="/backups")
+    """
+
+    # rows read at once while archiving a partition
+    archive_chunk_size = 1000
+
+    def __init__(self, model_class, column: str = "created"):
+        """
+        Args:
+            model_class: model of the partitioned table
+            column: epoch column used as partition key
+        """
+        self.model_class = model_class
+        self.column = column
+        self.table = model_class._meta.db_table
+        self.using = router.db_for_write(model_class)
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def quote(self, name: str) -> str:
+        return self.connection.ops.quote_name(name)
+
+    def partition_name(self, month: datetime) -> str:
+        return f"{self.table}_p{month:%Y%m}"
+
+    def is_partitioned(self) -> bool:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                [self.quote(self.table)],
+            )
+            row = cursor.fetchone()
+        return row is not None and row[0] == "p"
+
+    def get_partitions(self) -> list[tuple]:
+        """
+        Returns the monthly partitions as (name, first day of the month) tuples
+        ordered by month, the default partition is left out
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(%s)",
+                [self.quote(self.table)],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        pattern = re.compile(rf"^{re.escape(self.table)}_p(\d{{4}})(\d{{2}})$")
+        partitions = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                month = datetime(
+                    int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc
+                )
+                partitions.append((name, month))
+
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def create_partition(self, month: datetime):
+        """
+        Creates the partition of a month if it doesn't exist
+        Args:
+            month: first day of the month
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS %s PARTITION OF %s "
+                "FOR VALUES FROM (%d) TO (%d)"
+                % (
+                    self.quote(self.partition_name(month)),
+                    self.quote(self.table),
+                    int(month.timestamp()),
+                    int(add_months(month, 1).timestamp()),
+                )
+            )
+
+    def ensure_partitions(self, months_ahead: int = 3, since: datetime = None):
+        """
+        Creates the partitions from `since` up to `months_ahead` months ahead,
+        run it regularly so that new rows never land in the default partition
+        Args:
+            months_ahead: number of months to create ahead of the current one
+            since: first month to create, defaults to the current month
+        """
+        current = month_start(int(datetime.now(tz=timezone.utc).timestamp()))
+        month = since or current
+        while month <= add_months(current, months_ahead):
+            self.create_partition(month)
+            month = add_months(month, 1)
+
+    def partition(self, months_ahead: int = 3):
+        """
+        Converts the table into a partitioned table and copies the existing rows,
+        or only creates the upcoming partitions if it is partitioned already.
+        The primary key and unique constraints are extended with the partition
+        key as PostgreSQL requires. The conversion rewrites the whole table in
+        a single transaction, run it during a maintenance window.
+        Args:
+            months_ahead: number of months to create ahead of the current one
+        """
+        if self.is_partitioned():
+            self.ensure_partitions(months_ahead)
+            return
+
+        table = self.quote(self.table)
+        old_table = self.quote(f"{self.table}_unpartitioned")
+        column = self.quote(self.column)
+
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {column} = EXTRACT(EPOCH FROM created_at)::bigint "
+                f"WHERE {column} IS NULL"
+            )
+            cursor.execute(
+                "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')",
+                [table],
+            )
+            constraints = cursor.fetchall()
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE schemaname = current_schema() AND tablename = %s "
+                "AND indexname NOT IN ("
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))",
+                [self.table, table],
+            )
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"SELECT MIN({column}) FROM {table}")
+            oldest = cursor.fetchone()[0]
+
+            # deferred foreign key checks would block altering the table
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {old_table}")
+            cursor.execute(
+                f"CREATE TABLE {table} (LIKE {old_table} "
+                "INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+                f"PARTITION BY RANGE ({column})"
+            )
+            cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+            cursor.execute(
+                "CREATE TABLE %s PARTITION OF %s DEFAULT"
+                % (self.quote(f"{self.table}_default"), table)
+            )
+            self.ensure_partitions(
+                months_ahead, since=month_start(oldest) if oldest else None
+            )
+
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {old_table}")
+            cursor.execute(f"DROP TABLE {old_table}")
+
+            for name, kind, definition in constraints:
+                start = definition.index("(") + 1
+                columns = definition[start:-1].split(", ")
+                if kind in ("p", "u") and self.column not in columns:
+                    # unique constraints must contain the partition key
+                    definition = f"{definition[:-1]}, {column})"
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {self.quote(name)} "
+                    f"{definition}"
+                )
+            for definition in indexes:
+                cursor.execute(definition)
+
+    def archive_partition(self, name: str, path: str) -> int:
+        """
+        Writes the rows of a partition to a gzip compressed JSONL file
+        Args:
+            name: name of the partition
+            path: path of the archive file
+        Returns:
+            number of archived rows
+        """
+        partition = self.quote(name)
+        pk = self.quote(self.model_class._meta.pk.column)
+        count = 0
+        last_pk = None
+
+        with gzip.open(path, "wt", encoding="utf-8") as archive:
+            while True:
+                # keyset pagination keeps memory flat without server side cursors
+                with self.connection.cursor() as cursor:
+                    if last_pk is None:
+                        cursor.execute(
+                            f"SELECT {pk}, row_to_json(p)::text FROM {partition} p "
+                            f"ORDER BY {pk} LIMIT %s",
+                            [self.archive_chunk_size],
+                        )
+                    else:
+                        cursor.execute(
+                            f"SELECT {pk}, row_to_json(p)::text FROM {partition} p "
+                            f"WHERE {pk} > %s ORDER BY {pk} LIMIT %s",
+                            [last_pk, self.archive_chunk_size],
+                        )
+                    rows = cursor.fetchall()
+
+                for last_pk, row in rows:
+                    archive.write(row)
+                    archive.write("\n")
+                count += len(rows)
+
+                if len(rows) < self.archive_chunk_size:
+                    return count
+
+    def drop_partition(self, name: str):
+        """
+        Detaches and drops a partition
+        Args:
+            name: name of the partition
+        """
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            cursor.execute(
+                "ALTER TABLE %s DETACH PARTITION %s"
+                % (self.quote(self.table), self.quote(name))
+            )
+            cursor.execute("DROP TABLE %s" % self.quote(name))
+
+    def get_expired_partitions(self, retention_months: int, now: datetime = None):
+        """
+        Returns the partitions whose whole month is older than the retention window
+        Args:
+            retention_months: number of past months to keep besides the current one
+            now: reference time, defaults to the current time
+        """
+        now = now or datetime.now(tz=timezone.utc)
+        cutoff = add_months(month_start(int(now.timestamp())), -retention_months)
+        return [
+            (name, month) for name, month in self.get_partitions() if month < cutoff
+        ]
+
+    def drop_expired(
+        self, retention_months: int, archive_dir: str = None, now: datetime = None
+    ) -> list[str]:
+        """
+        Drops the partitions older than the retention window, archiving them
+        first when `archive_dir` is given
+        Args:
+            retention_months: number of past months to keep besides the current one
+            archive_dir: directory of the `<partition>.jsonl.gz` archive files
+            now: reference time, defaults to the current time
+        Returns:
+            names of the dropped partitions
+        """
+        dropped = []
+
+        for name, _ in self.get_expired_partitions(retention_months, now):
+            if archive_dir:
+                os.makedirs(archive_dir, exist_ok=True)
+                self.archive_partition(
+                    name, os.path.join(archive_dir, f"{name}.jsonl.gz")
+                )
+            self.drop_partition(name)
+            dropped.append(name)
+
+        return dropped
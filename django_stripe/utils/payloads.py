@@ -0,0 +1,130 @@
+# Standard Library
+import copy
+import json
+import zlib
+
+# Third Party Stuff
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# first byte of a packed payload
+CODECS = {"zlib": b"z", "zstd": b"s"}
+# second byte of a packed payload
+FULL = b"f"
+DIFF = b"d"
+
+
+def json_diff(base, value) -> dict:
+    """
+    Returns the difference of two JSON values, an empty dict if they are equal.
+    Dicts are compared key by key: `+` holds the added or replaced keys,
+    `-` the removed keys and `~` the diffs of the nested dicts.
+    Any other value is replaced as a whole with `=`.
+    """
+    if base == value:
+        return {}
+
+    if not (isinstance(base, dict) and isinstance(value, dict)):
+        return {"=": value}
+
+    diff = {}
+    added = {}
+    nested = {}
+    for key, item in value.items():
+        if key not in base:
+            added[key] = item
+        elif base[key] != item:
+            if isinstance(base[key], dict) and isinstance(item, dict):
+                nested[key] = json_diff(base[key], item)
+            else:
+                added[key] = item
+
+    removed = [key for key in base if key not in value]
+
+    if added:
+        diff["+"] = added
+    if removed:
+        diff["-"] = removed
+    if nested:
+        diff["~"] = nested
+    return diff
+
+
+def apply_json_diff(base, diff: dict):
+    """
+    Returns a copy of `base` with the diff built by `json_diff` applied
+    """
+    if "=" in diff:
+        return diff["="]
+
+    value = copy.deepcopy(base)
+    for key in diff.get("-", []):
+        del value[key]
+    value.update(diff.get("+", {}))
+    for key, nested in diff.get("~", {}).items():
+        value[key] = apply_json_diff(base[key], nested)
+    return value
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zlib":
+        return zlib.compress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImproperlyConfigured(
+                "The zstd payload codec requires the zstandard package, "
+                "install it with `pip install django-stripe-plus[zstd]`"
+            )
+        return zstandard.ZstdCompressor().compress(data)
+    raise ImproperlyConfigured(f"Unknown payload codec '{codec}'")
+
+
+def _decompress(data: bytes, codec: bytes) -> bytes:
+    if codec == CODECS["zlib"]:
+        return zlib.decompress(data)
+    if zstandard is None:
+        raise ImproperlyConfigured(
+            "Decompressing a zstd payload requires the zstandard package"
+        )
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def pack_payload(value, codec: str = "zlib", base=None) -> bytes:
+    """
+    Compresses a JSON value, as a diff of `base` when it is given
+    Args:
+        value: JSON value
+        codec: `zlib` or `zstd`
+        base: JSON value the packed value is a diff of
+    """
+    kind = FULL
+    if base is not None:
+        kind = DIFF
+        value = json_diff(base, value)
+
+    data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    compressed = _compress(data, codec)
+    return CODECS[codec] + kind + compressed
+
+
+def unpack_payload(data: bytes, get_base=None):
+    """
+    Decompresses a value packed by `pack_payload`
+    Args:
+        data: packed value
+        get_base: callable returning the base value of a diff
+    """
+    data = bytes(data)
+    if data[:1] in (b"{", b"["):
+        # plain JSON of a column converted from the `json` storage
+        return json.loads(data.decode("utf-8"))
+
+    value = json.loads(_decompress(data[2:], data[:1]).decode("utf-8"))
+
+    if data[1:2] == DIFF:
+        return apply_json_diff(get_base(), value)
+    return value
@@ -0,0 +1,155 @@
+# Standard Library
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 2011-01-01, start of the windows of a concurrent sync
+STRIPE_EPOCH = 1293840000
+
+_DONE = object()
+
+
+class _FetchFailed:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def split_created_windows(gte: int, lt: int, count: int) -> list[dict]:
+    """
+    Splits the `created` range [gte, lt) into `count` contiguous windows which
+    can be passed as `created` filter to the Stripe list API.
+    The first window has no lower bound so that objects older than `gte`
+    (e.g. imported with an earlier `created` time) are listed as well, and
+    the last window is left open ended so that objects created while the
+    sync is running are listed as well.
+    Args:
+        gte: start of the range (epoch)
+        lt: end of the range (epoch)
+        count: number of windows
+    """
+    step = max((lt - gte) // max(count, 1), 1)
+    bounds = []
+
+    for i in range(1, count):
+        bound = gte + i * step
+        if bound >= lt:
+            break
+        bounds.append(bound)
+
+    windows = []
+    for start, end in zip([None, *bounds], [*bounds, None]):
+        window = {}
+        if start is not None:
+            window["gte"] = start
+        if end is not None:
+            window["lt"] = end
+        windows.append(window)
+    return windows
+
+
+class RateLimiter:
+    """
+    Spaces out the calls of any number of threads to at most `rate` per second
+
+    Example:
+        limiter = RateLimiter(rate=20)
+        limiter.wait()
+        stripe.Customer.retrieve(stripe_id)
+    """
+
+    def __init__(self, rate: float = None):
+        """
+        Args:
+            rate: max number of calls per second, None for no limit
+        """
+        self.interval = 1 / rate if rate else 0
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        Blocks until the next call is allowed
+        """
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            call = max(self.next_call, now)
+            self.next_call = call + self.interval
+
+        if call > now:
+            time.sleep(call - now)
+
+
+class SyncPipeline:
+    """
+    Runs fetch tasks on a thread pool and hands over the batches they yield
+    to a single writer through a bounded queue, so that fetching pages from
+    the Stripe API overlaps with writing them to the database.
+
+    The writer always runs in the calling thread, fetch tasks must not
+    touch the database.
+
+    Example:
+        pipeline = SyncPipeline(writer=action.sync_batch, workers=4)
+        pipeline.run([fetch_window_1, fetch_window_2])
+    """
+
+    def __init__(self, writer, workers: int = 4, queue_size: int = 8):
+        """
+        Args:
+            writer: callable receiving each batch
+            workers: number of fetch threads
+            queue_size: max number of batches waiting for the writer
+        """
+        self.writer = writer
+        self.workers = workers
+        self.queue_size = queue_size
+
+    def run(self, tasks: list):
+        """
+        Runs all the fetch tasks and writes every batch they yield
+        Args:
+            tasks: list of callables returning an iterable of batches
+        """
+        batches = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def put(item):
+            # never block forever, the writer may have given up
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch(task):
+            try:
+                for batch in task():
+                    if not put(batch):
+                        return
+            except Exception as e:
+                put(_FetchFailed(e))
+            finally:
+                put(_DONE)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for task in tasks:
+                executor.submit(fetch, task)
+
+            pending = len(tasks)
+            try:
+                while pending:
+                    item = batches.get()
+                    if item is _DONE:
+                        pending -= 1
+                    elif isinstance(item, _FetchFailed):
+                        raise item.exc
+                    else:
+                        self.writer(item)
+            finally:
+                stop.set()
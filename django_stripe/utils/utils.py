@@ -1,5 +1,7 @@
 # Standard Library
 import decimal
+import hashlib
+import json
 from datetime import datetime
 
 CURRENCY_SYMBOLS = {
@@ -48,3 +50,13 @@ def convert_amount_for_db(amount, currency="usd"):
         if currency.lower() not in ZERO_DECIMAL_CURRENCIES
         else decimal.Decimal(amount)
     )
+
+
+def stripe_fingerprint(stripe_data):
+    """
+    Stable hash of the normalized stripe data
+    """
+    payload = json.dumps(
+        stripe_data, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,57 @@
+# Standard Library
+import json
+
+# Third Party Stuff
+from django.http import JsonResponse
+from django.views import View
+from stripe.error import SignatureVerificationError
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeWebhook
+from django_stripe.settings import stripe_settings
+
+
+class StripeWebhookView(View):
+    """
+    Async endpoint of the stripe webhooks, served by an ASGI worker the
+    requests to stripe don't block a thread, so a single worker handles
+    many concurrent deliveries.
+
+    The `Stripe-Signature` header is verified with `WEBHOOK_SECRET` when set,
+    otherwise every event is retrieved from stripe to validate it.
+
+    Example:
+        from django.urls import path
+        from django_stripe.views import StripeWebhookView
+
+        urlpatterns = [
+            path("stripe/webhook", StripeWebhookView.as_view()),
+        ]
+    """
+
+    http_method_names = ["post"]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # stripe can't send a csrf token, the webhooks are verified instead
+        view.csrf_exempt = True
+        return view
+
+    async def post(self, request, *args, **kwargs):
+        if stripe_settings.WEBHOOK_SECRET:
+            try:
+                event_data = StripeWebhook.construct_event(
+                    request.body, request.headers.get("Stripe-Signature")
+                )
+            except (SignatureVerificationError, ValueError):
+                return JsonResponse({"success": False}, status=400)
+            await StripeWebhook.aprocess_webhook(event_data, verified=True)
+            return JsonResponse({"success": True})
+
+        try:
+            event_data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"success": False}, status=400)
+        await StripeWebhook.aprocess_webhook(event_data)
+        return JsonResponse({"success": True})
@@ -4,11 +4,7 @@ from django_stripe.webhooks.register import StripeWebhook
 
 
 class CustomerSubscriptionStripeWebhook(StripeWebhook):
-    def process_webhook(self):
-        if self.event.validated_message:
-            StripeSubscriptionAction().sync(
-                self.event.validated_message["data"]["object"].copy(),
-            )
+    sync_action_class = StripeSubscriptionAction
 
 
 class CustomerSubscriptionCreatedWebhook(CustomerSubscriptionStripeWebhook):
@@ -21,6 +17,7 @@ class CustomerSubscriptionCreatedWebhook(CustomerSubscriptionStripeWebhook):
 class CustomerSubscriptionDeletedWebhook(CustomerSubscriptionStripeWebhook):
     name = "customer.subscription.deleted"
     description = "Occurs whenever a customer ends their subscription."
+    sync_action_class = None
 
     def process_webhook(self):
         if self.event.validated_message:
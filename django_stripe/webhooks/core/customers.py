@@ -41,7 +41,7 @@ class CustomerCreatedWebhook(StripeWebhook):
 
             # link customer to event
             self.event.customer = customer
-            self.event.save()
+            self.changed_fields.add("customer")
 
             # sync customer
             StripeCustomerAction().sync(stripe_customer)
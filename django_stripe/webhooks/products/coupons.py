@@ -4,11 +4,7 @@ from django_stripe.webhooks.register import StripeWebhook
 
 
 class CouponStripeWebhook(StripeWebhook):
-    def process_webhook(self):
-        if self.event.validated_message:
-            StripeCouponAction().sync(
-                self.event.validated_message["data"]["object"].copy()
-            )
+    sync_action_class = StripeCouponAction
 
 
 class CouponCreatedWebhook(CouponStripeWebhook):
@@ -24,6 +20,7 @@ class CouponUpdatedWebhook(CouponStripeWebhook):
 class CouponDeletedWebhook(CouponStripeWebhook):
     name = "coupon.deleted"
     description = "Occurs whenever a coupon is deleted."
+    sync_action_class = None
 
     def process_webhook(self):
         StripeCouponAction().soft_delete(
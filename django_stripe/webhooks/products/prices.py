@@ -4,11 +4,7 @@ from django_stripe.webhooks.register import StripeWebhook
 
 
 class PriceStripeWebhook(StripeWebhook):
-    def process_webhook(self):
-        if self.event.validated_message:
-            StripePriceAction().sync(
-                self.event.validated_message["data"]["object"].copy()
-            )
+    sync_action_class = StripePriceAction
 
 
 class PriceCreatedWebhook(PriceStripeWebhook):
@@ -24,6 +20,7 @@ class PriceUpdatedWebhook(PriceStripeWebhook):
 class PriceDeletedWebhook(PriceStripeWebhook):
     name = "price.deleted"
     description = "Occurs whenever a price is deleted."
+    sync_action_class = None
 
     def process_webhook(self):
         StripePriceAction().soft_delete(
@@ -4,11 +4,7 @@ from django_stripe.webhooks.register import StripeWebhook
 
 
 class ProductStripeWebhook(StripeWebhook):
-    def process_webhook(self):
-        if self.event.validated_message:
-            StripeProductAction().sync(
-                self.event.validated_message["data"]["object"].copy()
-            )
+    sync_action_class = StripeProductAction
 
 
 class ProductCreatedWebhook(ProductStripeWebhook):
@@ -0,0 +1,205 @@
+# Standard Library
+import logging
+import time
+from collections import defaultdict
+
+# Third Party Stuff
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+from django_stripe.models import StripeEvent
+from django_stripe.settings import stripe_settings
+from django_stripe.webhooks.register import registry
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_events(events) -> tuple:
+    """
+    Coalesces events of the same kind by the id of their object so that only
+    the newest state is applied. An event of a webhook which
+    `can_process_batch` is superseded when a newer validated event of the
+    same kind and object is in the batch, its handler is skipped and no
+    signal is sent for it. Events of other kinds, e.g. `product.created`
+    before `product.updated`, are separate notifications and all processed.
+    Args:
+        events: list of django_stripe.stripe.models.Event objects
+    Returns:
+        tuple of the events to process ordered from the oldest,
+        and the superseded events
+    """
+    events = sorted(events, key=lambda event: (event.created or 0, event.created_at))
+
+    def get_key(event):
+        message = event.validated_message or event.webhook_message
+        stripe_object = (message.get("data") or {}).get("object") or {}
+        return event.kind, stripe_object.get("id")
+
+    # only validated events, fetched from stripe or signed, supersede others,
+    # so an unverified delivery can't discard pending events
+    newest = {}
+    for position, event in enumerate(events):
+        key = get_key(event)
+        if event.validated_message is not None and key[1] is not None:
+            newest[key] = position
+
+    remaining, superseded = [], []
+    for position, event in enumerate(events):
+        if (
+            registry.get(event.kind).can_process_batch()
+            and newest.get(get_key(event), position) > position
+        ):
+            superseded.append(event)
+        else:
+            remaining.append(event)
+
+    return remaining, superseded
+
+
+def get_queue_backend():
+    """
+    Returns an instance of the queue backend set in `WEBHOOK_QUEUE_BACKEND`
+    """
+    return stripe_settings.WEBHOOK_QUEUE_BACKEND()
+
+
+class BaseQueueBackend:
+    """
+    Base class of the webhook queue backends.
+
+    When `WEBHOOK_ENQUEUE` is enabled the webhook view only persists the
+    `StripeEvent` and hands it over to `enqueue`, a worker then calls
+    `process_pending` to run the webhook handlers outside of the request.
+    """
+
+    def enqueue(self, event):
+        """
+        Called once an event is persisted, e.g. to push it to a task queue
+        Args:
+            event: the django_stripe.stripe.models.Event object
+        """
+
+    def process_pending(self, batch_size: int = 10) -> tuple:
+        """
+        Processes a batch of pending events
+        Args:
+            batch_size: max number of events to process
+        Returns:
+            tuple of the number of events claimed and processed
+        """
+        raise NotImplementedError
+
+    def run_worker(self, batch_size: int = 10, poll_interval: float = 1, once=False):
+        """
+        Processes pending events until stopped
+        Args:
+            batch_size: max number of events claimed at once
+            poll_interval: seconds to wait when the queue is drained
+            once: stop once the queue is drained
+        """
+        while True:
+            claimed, processed = self.process_pending(batch_size)
+
+            if claimed < batch_size or not processed:
+                if once:
+                    return
+                time.sleep(poll_interval)
+
+
+class DatabaseQueueBackend(BaseQueueBackend):
+    """
+    Uses the `StripeEvent` table as queue, every unprocessed event with
+    a registered handler is pending.
+    Events are claimed with `SELECT ... FOR UPDATE SKIP LOCKED` so that
+    any number of workers can process the queue concurrently.
+
+    Example:
+        from django_stripe.webhooks.queues import DatabaseQueueBackend
+        DatabaseQueueBackend().run_worker()
+    """
+
+    def get_pending_events(self):
+        """
+        Returns the events due for processing, new events first and failed
+        events once their next attempt is due, dead lettered events are left out.
+        Without `WEBHOOK_ENQUEUE` new events are processed inside their webhook
+        request, so only the failed events are retried here
+        """
+        due = Q(next_attempt_at__lte=timezone.now())
+        if stripe_settings.WEBHOOK_ENQUEUE:
+            due |= Q(next_attempt_at__isnull=True)
+        return (
+            StripeEvent.objects.filter(
+                due,
+                processed=False,
+                dead_lettered_at__isnull=True,
+                kind__in=list(registry.keys()),
+            )
+            .exclude(valid=False)
+            .order_by(F("next_attempt_at").asc(nulls_first=True), "created_at")
+        )
+
+    def process_event(self, event) -> bool:
+        """
+        Processes a single event, the next attempt of a failed event is
+        scheduled with an exponential backoff
+        Args:
+            event: the django_stripe.stripe.models.Event object
+        Returns:
+            True if the event was processed without error
+        """
+        try:
+            with transaction.atomic(using=router.db_for_write(StripeEvent)):
+                StripeEventAction.process(event)
+        except Exception as e:
+            logger.exception(
+                "Error occurred while processing stripe event, event_id=%s",
+                event.stripe_id,
+            )
+            StripeEventAction.record_failure(event, e)
+            return False
+        return True
+
+    def process_pending(self, batch_size: int = 10) -> tuple:
+        processed = 0
+
+        with transaction.atomic(using=router.db_for_write(StripeEvent)):
+            events = list(
+                self.get_pending_events().select_for_update(skip_locked=True)[
+                    :batch_size
+                ]
+            )
+
+            # only the newest state of an object is applied
+            remaining, superseded = coalesce_events(events)
+            if superseded:
+                StripeEvent.objects.filter(
+                    pk__in=[event.pk for event in superseded]
+                ).update(processed=True, updated_at=timezone.now())
+                processed += len(superseded)
+
+            # events of the same kind are handed over to the webhook together
+            events_by_kind = defaultdict(list)
+            for event in remaining:
+                events_by_kind[event.kind].append(event)
+
+            for kind, kind_events in events_by_kind.items():
+                try:
+                    with transaction.atomic(using=router.db_for_write(StripeEvent)):
+                        processed += registry.get(kind).process_batch(kind_events)
+                except Exception:
+                    logger.exception(
+                        "Error occurred while processing a batch of stripe events, "
+                        "kind=%s",
+                        kind,
+                    )
+                    # retry one by one so that a failing event
+                    # doesn't hold back the others
+                    for event in kind_events:
+                        event.refresh_from_db()
+                        processed += self.process_event(event)
+
+        return len(events), processed
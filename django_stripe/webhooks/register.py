@@ -3,10 +3,16 @@ import json
 
 # Third Party Stuff
 import stripe
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
 from six import with_metaclass
 
 # Django Stripe Stuff
 from django_stripe.actions import StripeEventAction
+from django_stripe.instrumentation import count_stage_queries, stage
+from django_stripe.models import StripeEvent
 from django_stripe.webhooks.webhooks import WebhookRegistry
 
 registry = WebhookRegistry()
@@ -27,10 +33,14 @@ class StripeWebhook(with_metaclass(Registerable, object)):
     """
     REGISTRY: webhook registry
     name: webhook event name
+    sync_action_class: action syncing the object of the event, when set
+        and `process_webhook` isn't overridden `process_batch` syncs the
+        objects of a batch with one `sync_batch`
     """
 
     REGISTRY = registry
     name = None
+    sync_action_class = None
 
     def __init__(self, event):
         if event.kind != self.name:
@@ -40,25 +50,60 @@ class StripeWebhook(with_metaclass(Registerable, object)):
                 )
             )
         self.event = event
+        # event fields changed while processing, saved at once by `save_event`
+        self.changed_fields = set()
 
-    def validate(self):
+    def save_event(self):
+        """
+        Saves the event fields changed while processing with a single update
+        """
+        if self.changed_fields:
+            self.event.save(update_fields=[*sorted(self.changed_fields), "updated_at"])
+            self.changed_fields.clear()
+
+    def validate(self, save=True):
         """
         Validate incoming events
-        We fetch the event data to ensure it is legit
+        We fetch the event data to ensure it is legit,
+        events fetched from stripe already are not retrieved again
+        Args:
+            save: False to leave saving the event to the caller
         """
-        evt = stripe.Event.retrieve(
-            self.event.stripe_id,
-        )
+        if self.event.validated_message is None:
+            evt = stripe.Event.retrieve(
+                self.event.stripe_id,
+            )
+            self.set_validated_message(evt)
+        self.set_valid()
+        if save:
+            self.save_event()
+
+    async def avalidate(self):
+        """
+        Validates the event like `validate` without blocking the event loop
+        while the event is retrieved, the event is not saved
+        """
+        if self.event.validated_message is None:
+            evt = await stripe.Event.retrieve_async(
+                self.event.stripe_id,
+            )
+            self.set_validated_message(evt)
+        self.set_valid()
+
+    def set_validated_message(self, evt):
         self.event.validated_message = json.loads(
             json.dumps(
                 dict(evt),
                 sort_keys=True,
             )
         )
+        self.changed_fields.add("validated_message")
+
+    def set_valid(self):
         self.event.valid = self.is_event_valid(
             self.event.webhook_message["data"], self.event.validated_message["data"]
         )
-        self.event.save()
+        self.changed_fields.add("valid")
 
     @staticmethod
     def is_event_valid(webhook_message_data, validated_message_data):
@@ -69,26 +114,154 @@ class StripeWebhook(with_metaclass(Registerable, object)):
             == validated_message_data["object"]["id"]
         )
 
+    def sync_event_object(self):
+        """
+        Syncs the object of the event with `sync_action_class`,
+        the object is skipped if a newer event was applied to it already
+        """
+        stripe_object = self.event.validated_message["data"]["object"].copy()
+        action = self.sync_action_class()
+
+        if self.event.created is None:
+            action.sync(stripe_object)
+        else:
+            action.sync_if_newer(stripe_object, self.event.created)
+
     def send_signal(self):
         signal = self.REGISTRY.get_signal(self.name)
         if signal:
             return signal.send(sender=self.__class__, event=self.event)
 
     def process(self):
+        """
+        Validates and processes the event in a single transaction,
+        the changes of the event are saved once at the end
+        """
         if self.event.processed:
             return
-        self.validate()
-        if not self.event.valid:
+
+        with transaction.atomic():
+            with stage("validate", self.name):
+                self.validate(save=False)
+            self.apply()
+
+    async def aprocess(self):
+        """
+        Processes the event like `process`, the event is validated
+        asynchronously and the database work runs in a single transaction
+        in the thread of the database connection
+        """
+        if self.event.processed:
             return
 
-        try:
-            StripeEventAction().link_customer(self.event)
-            self.process_webhook()
-            self.send_signal()
-            self.event.processed = True
-            self.event.save()
-        except Exception as e:
-            raise e
+        with stage("validate", self.name):
+            await self.avalidate()
+        await sync_to_async(count_stage_queries(self.apply))()
+
+    def apply(self):
+        """
+        Links the customer of a valid event, runs `process_webhook`, sends
+        the signal and saves the changes of the event once
+        """
+        with transaction.atomic():
+            if self.event.valid:
+                with stage("link_customer", self.name):
+                    StripeEventAction().link_customer(self.event, save=False)
+                if self.event.customer_id is not None:
+                    self.changed_fields.add("customer")
+                with stage("process_webhook", self.name):
+                    self.process_webhook()
+                with stage("signal", self.name):
+                    self.send_signal()
+                self.event.processed = True
+                self.changed_fields.add("processed")
+            with stage("save", self.name):
+                self.save_event()
 
     def process_webhook(self):
-        return
+        """
+        Syncs the object of the event with `sync_action_class` if it is set
+        """
+        if self.sync_action_class is not None and self.event.validated_message:
+            self.sync_event_object()
+
+    @classmethod
+    def can_process_batch(cls) -> bool:
+        """
+        Returns True if the events of this kind can be processed in a batch,
+        i.e. the webhook has a `sync_action_class` and doesn't override
+        `process_webhook`
+        """
+        return (
+            cls.sync_action_class is not None
+            and cls.process_webhook is StripeWebhook.process_webhook
+        )
+
+    @classmethod
+    def process_batch(cls, events):
+        """
+        Processes a batch of events of this kind. Webhooks which
+        `can_process_batch` sync the objects of all the events with a single
+        `sync_batch` and save the events with a single query, the newest event
+        of an object wins. Other webhooks process the events one by one.
+        Valid events whose customer doesn't exist are recorded as failed
+        like in `process`, so that they are retried with a backoff.
+        Args:
+            events: list of django_stripe.stripe.models.Event objects,
+                ordered from the oldest
+        Returns:
+            number of events processed
+        """
+        if not cls.can_process_batch():
+            for event in events:
+                cls(event).process()
+            return sum(event.processed for event in events)
+
+        webhooks = []
+        for event in events:
+            if event.processed:
+                continue
+            webhook = cls(event)
+            webhook.validate(save=False)
+            webhooks.append(webhook)
+
+        linked = set(
+            StripeEventAction().link_customers(
+                [webhook.event for webhook in webhooks if webhook.event.valid]
+            )
+        )
+
+        stripe_objects = {}
+        events_created = {}
+        for webhook in webhooks:
+            if webhook.event in linked:
+                stripe_object = webhook.event.validated_message["data"]["object"]
+                stripe_objects[stripe_object["id"]] = stripe_object.copy()
+                if webhook.event.created is not None:
+                    events_created[stripe_object["id"]] = webhook.event.created
+
+        if stripe_objects:
+            cls.sync_action_class().sync_batch(
+                list(stripe_objects.values()), events_created=events_created
+            )
+
+        now = timezone.now()
+        for webhook in webhooks:
+            webhook.event.updated_at = now
+            if webhook.event in linked:
+                webhook.send_signal()
+                webhook.event.processed = True
+            elif webhook.event.valid:
+                StripeEventAction.record_failure(
+                    webhook.event,
+                    Http404(
+                        "Stripe customer does not exist for "
+                        f"event={webhook.event.stripe_id}"
+                    ),
+                )
+
+        StripeEvent.objects.bulk_update(
+            [webhook.event for webhook in webhooks],
+            ["validated_message", "valid", "customer", "processed", "updated_at"],
+        )
+        return len(linked)
@@ -0,0 +1,172 @@
+# Standard Library
+import logging
+import multiprocessing
+import time
+from collections import deque
+
+# Third Party Stuff
+from django.db import connections, router, transaction
+
+# Django Stripe Stuff
+from django_stripe.models import StripeEvent
+from django_stripe.webhooks.register import registry
+
+logger = logging.getLogger(__name__)
+
+
+class EventReplay:
+    """
+    Re-runs the registered webhook handlers of stored events, e.g. after
+    fixing a handler or registering a new one. The selected events are
+    streamed with a server side cursor and replayed in chunks, by forked
+    worker processes when `processes` is more than one.
+
+    Objects synced by a webhook with a `sync_action_class` are only updated
+    when the event is newer than the last one applied to the object.
+
+    Example:
+        from django_stripe.webhooks.replay import EventReplay
+        replay = EventReplay(kinds=["product.updated"], processed=True)
+        replay.replay(processes=4)
+    """
+
+    # number of events read from the cursor and replayed at once
+    chunk_size = 500
+
+    def __init__(
+        self,
+        kinds: list = None,
+        since: int = None,
+        until: int = None,
+        processed: bool = None,
+        valid: bool = None,
+    ):
+        """
+        Args:
+            kinds: kinds of the events, defaults to every registered kind
+            since: replay events created at or after this time (epoch)
+            until: replay events created before this time (epoch)
+            processed: only replay processed (True) or unprocessed (False) events
+            valid: only replay valid (True) or invalid (False) events
+        """
+        self.kinds = kinds
+        self.since = since
+        self.until = until
+        self.processed = processed
+        self.valid = valid
+
+    def get_events(self):
+        """
+        Returns the selected events ordered from the oldest, events of kinds
+        without a registered webhook are left out
+        """
+        kinds = set(registry.keys())
+        if self.kinds:
+            kinds &= set(self.kinds)
+
+        events = StripeEvent.objects.filter(kind__in=kinds)
+        if self.since is not None:
+            events = events.filter(created__gte=self.since)
+        if self.until is not None:
+            events = events.filter(created__lt=self.until)
+        if self.processed is not None:
+            events = events.filter(processed=self.processed)
+        if self.valid is not None:
+            events = events.filter(valid=self.valid)
+
+        return events.order_by("created", "created_at")
+
+    def replay_event(self, event) -> bool:
+        """
+        Re-runs the webhook handler of an event
+        Args:
+            event: the django_stripe.stripe.models.Event object
+        Returns:
+            True if the event was replayed without error
+        """
+        event.processed = False
+        try:
+            with transaction.atomic(using=router.db_for_write(StripeEvent)):
+                registry.get(event.kind)(event).process()
+        except Exception:
+            logger.exception(
+                "Error occurred while replaying stripe event, event_id=%s",
+                event.stripe_id,
+            )
+            return False
+        return True
+
+    def replay_chunk(self, pks: list) -> tuple:
+        """
+        Replays the events of a chunk ordered from the oldest
+        Args:
+            pks: primary keys of the events
+        Returns:
+            tuple of the number of events replayed and failed
+        """
+        events = StripeEvent.objects.filter(pk__in=pks).order_by(
+            "created", "created_at"
+        )
+        replayed = sum(self.replay_event(event) for event in events)
+        return replayed, len(pks) - replayed
+
+    def iter_chunks(self):
+        chunk = []
+        pks = self.get_events().values_list("pk", flat=True)
+        for pk in pks.iterator(chunk_size=self.chunk_size):
+            chunk.append(pk)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def replay(self, processes: int = 1, dry_run=False, progress=None) -> dict:
+        """
+        Replays the selected events
+        Args:
+            processes: number of worker processes
+            dry_run: only count the selected events
+            progress: called with the number of events done so far, the total
+                number of events and the elapsed seconds after every chunk
+        Returns:
+            dict of the number of `selected`, `replayed` and `failed` events
+        """
+        result = {"selected": 0, "replayed": 0, "failed": 0}
+        total = self.get_events().count()
+        started = time.monotonic()
+
+        def report(replayed, failed):
+            result["replayed"] += replayed
+            result["failed"] += failed
+            if progress is not None:
+                done = result["replayed"] + result["failed"]
+                progress(done, total, time.monotonic() - started)
+
+        if dry_run:
+            result["selected"] = total
+            return result
+
+        if processes <= 1:
+            for chunk in self.iter_chunks():
+                result["selected"] += len(chunk)
+                report(*self.replay_chunk(chunk))
+            return result
+
+        # fork before the cursor is opened,
+        # every process has to open its own database connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes) as pool:
+            # a few chunks in flight per worker keep the memory flat
+            pending = deque()
+            for chunk in self.iter_chunks():
+                result["selected"] += len(chunk)
+                pending.append(pool.apply_async(self.replay_chunk, (chunk,)))
+                if len(pending) >= processes * 2:
+                    report(*pending.popleft().get())
+
+            while pending:
+                report(*pending.popleft().get())
+
+        return result
@@ -0,0 +1,90 @@
+# Standard Library
+import hashlib
+import hmac
+import time
+
+
+class FakeStripeListAPI:
+    """
+    Local stand-in for a listable Stripe resource (e.g. `stripe.Product`)
+    Supports the `created` filter and paginates like the Stripe list API.
+    """
+
+    def __init__(self, objects, latency=0):
+        self.objects = sorted(objects, key=lambda obj: obj["created"], reverse=True)
+        self.latency = latency
+        self.calls = []
+
+    def _matches(self, obj, created):
+        if not created:
+            return True
+        return obj["created"] >= created.get("gte", obj["created"]) and obj[
+            "created"
+        ] < created.get("lt", obj["created"] + 1)
+
+    def list(self, created=None, limit=10, starting_after=None):
+        self.calls.append({"created": created, "starting_after": starting_after})
+        time.sleep(self.latency)
+
+        objects = [obj for obj in self.objects if self._matches(obj, created)]
+        if starting_after:
+            ids = [obj["id"] for obj in objects]
+            start = ids.index(starting_after) + 1
+            objects = objects[start:]
+
+        return {
+            "data": [obj.copy() for obj in objects[:limit]],
+            "has_more": len(objects) > limit,
+        }
+
+    def auto_paging_iter(self, created=None, limit=10):
+        starting_after = None
+        while True:
+            page = self.list(
+                created=created, limit=limit, starting_after=starting_after
+            )
+            yield from page["data"]
+            if not page["has_more"]:
+                return
+            starting_after = page["data"][-1]["id"]
+
+
+WEBHOOK_SECRET = "whsec_test_secret"
+
+
+def sign(payload, secret=WEBHOOK_SECRET, timestamp=None):
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(
+        secret.encode("utf-8"),
+        msg=f"{timestamp}.{payload}".encode("utf-8"),
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def make_product_event(stripe_id, name="Gold Plan"):
+    return {
+        "id": stripe_id,
+        "object": "event",
+        "type": "product.created",
+        "api_version": "2024-06-20",
+        "created": 1726300960,
+        "data": {
+            "object": {
+                "id": "prod_NWjs8kKbJWmuuc",
+                "object": "product",
+                "active": True,
+                "created": 1678833149,
+                "description": None,
+                "images": [],
+                "livemode": False,
+                "metadata": {},
+                "name": name,
+                "updated": 1678833149,
+                "url": None,
+            }
+        },
+        "livemode": False,
+        "pending_webhooks": 1,
+        "request": None,
+    }
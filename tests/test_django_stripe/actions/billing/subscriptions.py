@@ -421,3 +421,110 @@ class StripeSubscriptionActionTestCase(TestCase):
         self.assertEqual(
             subscription.metadata, self.subscription_data["metadata"] or {}
         )
+
+    def test_sync_batch_assigns_customer_id(self):
+        action = StripeSubscriptionAction()
+
+        # customers check, subscriptions lookup and bulk insert
+        with self.assertNumQueries(3):
+            action.sync_batch([self.subscription_data.copy()])
+
+        subscription = StripeSubscription.objects.get(
+            stripe_id="sub_1MowQVLkdIwHu7ixeRlqHVzs"
+        )
+        self.assertEqual(subscription.customer, self.stripe_customer)
+
+    @patch("stripe.Customer.retrieve")
+    def test_sync_batch_backfills_missing_customer(self, mock_retrieve):
+        mock_retrieve.return_value = {
+            "id": "cus_missing",
+            "object": "customer",
+            "email": "missing@example.com",
+            "metadata": {},
+            "name": "Missing Customer",
+        }
+        subscription_data = self.subscription_data.copy()
+        subscription_data["customer"] = "cus_missing"
+
+        StripeSubscriptionAction().sync_batch([subscription_data])
+
+        mock_retrieve.assert_called_once_with("cus_missing")
+        subscription = StripeSubscription.objects.get(
+            stripe_id="sub_1MowQVLkdIwHu7ixeRlqHVzs"
+        )
+        self.assertEqual(subscription.customer.email, "missing@example.com")
+
+    @patch("stripe.Customer.retrieve")
+    def test_sync_batch_skips_deleted_customer(self, mock_retrieve):
+        stripe_customers = {
+            "cus_deleted": {"id": "cus_deleted", "object": "customer", "deleted": True},
+            "cus_missing": {
+                "id": "cus_missing",
+                "object": "customer",
+                "email": "missing@example.com",
+                "metadata": {},
+                "name": "Missing Customer",
+            },
+        }
+        mock_retrieve.side_effect = stripe_customers.get
+        subscription_data = self.subscription_data.copy()
+        subscription_data["customer"] = "cus_deleted"
+        other_subscription_data = self.subscription_data.copy()
+        other_subscription_data["id"] = "sub_other"
+        other_subscription_data["customer"] = "cus_missing"
+
+        StripeSubscriptionAction().sync_batch(
+            [subscription_data, other_subscription_data]
+        )
+
+        self.assertIsNone(
+            StripeSubscription.objects.get(
+                stripe_id="sub_1MowQVLkdIwHu7ixeRlqHVzs"
+            ).customer
+        )
+        self.assertEqual(
+            StripeSubscription.objects.get(stripe_id="sub_other").customer.email,
+            "missing@example.com",
+        )
+        self.assertFalse(
+            StripeCustomer.objects.filter(stripe_id="cus_deleted").exists()
+        )
+
+    @patch("stripe.Customer.retrieve")
+    def test_sync_batch_without_backfill(self, mock_retrieve):
+        subscription_data = self.subscription_data.copy()
+        subscription_data["customer"] = "cus_missing"
+        other_subscription_data = self.subscription_data.copy()
+        other_subscription_data["id"] = "sub_other"
+
+        action = StripeSubscriptionAction()
+        action.backfill_missing_customers = False
+        action.sync_batch([subscription_data, other_subscription_data])
+
+        mock_retrieve.assert_not_called()
+        subscription = StripeSubscription.objects.get(
+            stripe_id="sub_1MowQVLkdIwHu7ixeRlqHVzs"
+        )
+        self.assertIsNone(subscription.customer)
+        self.assertEqual(
+            StripeSubscription.objects.get(stripe_id="sub_other").customer,
+            self.stripe_customer,
+        )
+
+    def test_set_default_compiles_field_plan_once(self):
+        action = StripeSubscriptionAction()
+        StripeSubscriptionAction._field_plan = None
+
+        with patch.object(
+            StripeSubscriptionAction,
+            "compile_field_plan",
+            wraps=action.compile_field_plan,
+        ) as mock_compile:
+            defaults = action.set_default(self.subscription_data)
+            StripeSubscriptionAction().set_default(self.subscription_data)
+
+        mock_compile.assert_called_once()
+        self.assertEqual(defaults["customer_id"], "cus_Na6dX7aXxi11N4")
+        self.assertEqual(defaults["default_source"], "")
+        self.assertIsNone(defaults["canceled_at"])
+        self.assertEqual(defaults["current_period_end"], "2023-04-23 22:16:07")
@@ -5,6 +5,7 @@ from unittest.mock import patch
 from django.apps import apps
 from django.conf import settings
 from django.test import TestCase
+from stripe.error import InvalidRequestError
 
 # Django Stripe Stuff
 from django_stripe.actions import StripeCustomerAction
@@ -76,6 +77,37 @@ class StripeCustomerActionTest(TestCase):
         self.assertEqual(customer.name, self.stripe_data["name"])
         self.assertEqual(customer.user, self.user)
 
+    @patch("stripe.Customer.retrieve")
+    def test_sync_by_ids_retrieves_concurrently_and_skips_missing(self, mock_retrieve):
+        def retrieve(stripe_id):
+            if stripe_id == "cus_missing":
+                raise InvalidRequestError("No such customer", "id", http_status=404)
+            return {**self.stripe_data, "id": stripe_id}
+
+        mock_retrieve.side_effect = retrieve
+        self.action.requests_per_second = None
+        stripe_ids = ["cus_test0", "cus_missing", "cus_test1", "cus_test0"]
+
+        # users lookup, customers lookup and bulk insert
+        with self.assertNumQueries(3):
+            missing_ids = self.action.sync_by_ids(stripe_ids)
+
+        self.assertEqual(missing_ids, ["cus_missing"])
+        self.assertEqual(mock_retrieve.call_count, 3)
+        self.assertEqual(
+            set(StripeCustomer.objects.values_list("stripe_id", flat=True)),
+            {"cus_test0", "cus_test1"},
+        )
+
+    @patch("stripe.Customer.retrieve")
+    def test_sync_by_ids_raises_other_errors(self, mock_retrieve):
+        mock_retrieve.side_effect = InvalidRequestError(
+            "Invalid request", "id", http_status=400
+        )
+
+        with self.assertRaises(InvalidRequestError):
+            self.action.sync_by_ids(["cus_test0"])
+
     @patch("stripe.Customer.auto_paging_iter")
     def test_sync_all(self, mock_auto_paging_iter):
         # Mocking the stripe customers data
@@ -152,6 +184,43 @@ class StripeCustomerActionTest(TestCase):
             ).exists()
         )
 
+    @patch("stripe.Customer.auto_paging_iter")
+    def test_sync_all_streaming_with_deleted_objects(self, mock_auto_paging_iter):
+        mock_auto_paging_iter.return_value = iter(
+            [
+                {
+                    "id": "cus_test1",
+                    "object": "customer",
+                    "created": 1678037688,
+                    "email": "test1@example.com",
+                    "metadata": {},
+                    "name": "Customer One",
+                    "source": None,
+                }
+            ]
+        )
+
+        # Create a customer that will be deleted
+        StripeCustomer.objects.create(
+            stripe_id="cus_test2",
+            email="test2@example.com",
+            name="Customer Two",
+        )
+
+        # Execute sync_all method in streaming mode
+        self.action.batch_size = 1
+        sync_generation = self.action.sync_all(streaming=True)
+
+        # Assertions
+        customer = StripeCustomer.objects.get(stripe_id="cus_test1")
+        self.assertEqual(customer.sync_generation, sync_generation)
+        self.assertIsNone(customer.deleted_at)
+        self.assertTrue(
+            StripeCustomer.objects.filter(
+                stripe_id="cus_test2", deleted_at__isnull=False
+            ).exists()
+        )
+
     @patch("stripe.Customer.auto_paging_iter")
     def test_sync_batch(self, mock_auto_paging_iter):
         # Mocking the stripe customers data
@@ -191,3 +260,47 @@ class StripeCustomerActionTest(TestCase):
         # Assertions
         customer.refresh_from_db()
         self.assertIsNotNone(customer.deleted_at)
+
+    def test_sync_batch_resolves_users_in_one_query(self):
+        stripe_customers = []
+        for i in range(3):
+            stripe_data = self.stripe_data.copy()
+            stripe_data["id"] = f"cus_test{i}"
+            stripe_customers.append(stripe_data)
+
+        # users lookup, customers lookup and bulk insert
+        with self.assertNumQueries(3):
+            self.action.sync_batch(stripe_customers)
+
+        self.assertEqual(StripeCustomer.objects.filter(user=self.user).count(), 3)
+
+    def test_sync_batch_case_insensitive_email(self):
+        stripe_data = self.stripe_data.copy()
+        stripe_data["email"] = "JennyRosen@Example.com"
+
+        self.action.sync_batch([stripe_data.copy()])
+        customer = StripeCustomer.objects.get(stripe_id=self.stripe_data["id"])
+        self.assertIsNone(customer.user)
+
+        self.action.case_insensitive_email = True
+        self.action.sync_batch([stripe_data.copy()])
+        customer.refresh_from_db()
+        self.assertEqual(customer.user, self.user)
+
+    def test_sync_batch_upsert_keeps_fields_missing_in_data(self):
+        self.action.sync_batch([self.stripe_data.copy()])
+        other_data = self.stripe_data.copy()
+        other_data["id"] = "cus_other"
+        deleted_data = {
+            "id": self.stripe_data["id"],
+            "object": "customer",
+            "deleted": True,
+        }
+
+        self.action.use_upsert = True
+        self.action.sync_batch([deleted_data, other_data])
+
+        customer = StripeCustomer.objects.get(stripe_id=self.stripe_data["id"])
+        self.assertEqual(customer.email, "jennyrosen@example.com")
+        self.assertEqual(customer.name, "Jenny Rosen")
+        self.assertTrue(StripeCustomer.objects.filter(stripe_id="cus_other").exists())
@@ -0,0 +1,209 @@
+# Standard Library Stuff
+from unittest.mock import MagicMock, patch
+
+# Third Party Stuff
+from django.test import TestCase, override_settings
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+from django_stripe.metrics import get_metrics_backend
+from django_stripe.models import (
+    StripeEvent,
+    StripeEventSummary,
+    StripeProduct,
+    StripeSyncCheckpoint,
+)
+
+
+class StripeEventActionIncrementalSyncTest(TestCase):
+    def setUp(self):
+        self.action = StripeEventAction()
+        self.product_data = {
+            "id": "prod_NWjs8kKbJWmuuc",
+            "object": "product",
+            "active": True,
+            "created": 1678833149,
+            "default_price": None,
+            "description": None,
+            "images": [],
+            "livemode": False,
+            "metadata": {},
+            "name": "Gold Plan",
+            "updated": 1678833149,
+            "url": None,
+        }
+
+    def make_event(self, stripe_id, created, name):
+        return {
+            "id": stripe_id,
+            "object": "event",
+            "type": "product.updated",
+            "api_version": "2024-06-20",
+            "created": created,
+            "data": {"object": {**self.product_data, "name": name}},
+            "livemode": False,
+            "pending_webhooks": 0,
+            "request": None,
+        }
+
+    @patch("stripe.Event.list")
+    def test_first_run_records_latest_event(self, mock_list):
+        mock_list.return_value = MagicMock(
+            data=[self.make_event("evt_3", 1700000300, "Gold Plan")]
+        )
+
+        count = self.action.sync_incremental(name="nightly")
+
+        self.assertEqual(count, 0)
+        checkpoint = StripeSyncCheckpoint.objects.get(name="nightly")
+        self.assertEqual(checkpoint.last_event_id, "evt_3")
+        self.assertEqual(checkpoint.last_event_created, 1700000300)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    @patch("stripe.Event.retrieve")
+    @patch("stripe.Event.auto_paging_iter")
+    def test_resumes_from_checkpoint(self, mock_auto_paging_iter, mock_retrieve):
+        StripeSyncCheckpoint.objects.create(
+            name="nightly", last_event_id="evt_0", last_event_created=1700000000
+        )
+        # pages oldest first when `ending_before` is given
+        mock_auto_paging_iter.return_value = iter(
+            [
+                self.make_event("evt_1", 1700000100, "Silver Plan"),
+                self.make_event("evt_2", 1700000200, "Platinum Plan"),
+            ]
+        )
+
+        count = self.action.sync_incremental(name="nightly")
+
+        self.assertEqual(count, 2)
+        mock_auto_paging_iter.assert_called_once_with(ending_before="evt_0", limit=100)
+        # events from the list are trusted and not retrieved again
+        mock_retrieve.assert_not_called()
+
+        product = StripeProduct.objects.get(stripe_id=self.product_data["id"])
+        self.assertEqual(product.name, "Platinum Plan")
+        self.assertTrue(StripeEvent.objects.get(stripe_id="evt_2").processed)
+
+        checkpoint = StripeSyncCheckpoint.objects.get(name="nightly")
+        self.assertEqual(checkpoint.last_event_id, "evt_2")
+        self.assertEqual(checkpoint.last_event_created, 1700000200)
+
+    @patch("stripe.Event.auto_paging_iter")
+    def test_since_processes_oldest_first(self, mock_auto_paging_iter):
+        # listed newest first without `ending_before`
+        mock_auto_paging_iter.return_value = iter(
+            [
+                self.make_event("evt_2", 1700000200, "Platinum Plan"),
+                self.make_event("evt_1", 1700000100, "Silver Plan"),
+            ]
+        )
+
+        count = self.action.sync_incremental(name="nightly", since=1700000000)
+
+        self.assertEqual(count, 2)
+        mock_auto_paging_iter.assert_called_once_with(
+            created={"gte": 1700000000}, limit=100
+        )
+        product = StripeProduct.objects.get(stripe_id=self.product_data["id"])
+        self.assertEqual(product.name, "Platinum Plan")
+        checkpoint = StripeSyncCheckpoint.objects.get(name="nightly")
+        self.assertEqual(checkpoint.last_event_id, "evt_2")
+
+    @patch("stripe.Event.auto_paging_iter")
+    def test_limit_and_duplicates(self, mock_auto_paging_iter):
+        StripeSyncCheckpoint.objects.create(name="nightly", last_event_id="evt_0")
+        self.action.process_event(self.make_event("evt_1", 1700000100, "Silver Plan"))
+        mock_auto_paging_iter.return_value = iter(
+            [
+                self.make_event("evt_1", 1700000100, "Silver Plan"),
+                self.make_event("evt_2", 1700000200, "Platinum Plan"),
+                self.make_event("evt_3", 1700000300, "Bronze Plan"),
+            ]
+        )
+
+        count = self.action.sync_incremental(name="nightly", limit=2)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(StripeEvent.objects.filter(stripe_id="evt_1").count(), 1)
+        self.assertFalse(StripeEvent.objects.filter(stripe_id="evt_3").exists())
+        checkpoint = StripeSyncCheckpoint.objects.get(name="nightly")
+        self.assertEqual(checkpoint.last_event_id, "evt_2")
+
+
+class StripeEventActionAddTest(TestCase):
+    def add(self, stripe_id="evt_1"):
+        return StripeEventAction.add(
+            stripe_id=stripe_id,
+            kind="charge.succeeded",
+            livemode=False,
+            api_version="2024-06-20",
+            message={"id": stripe_id, "type": "charge.succeeded"},
+            process=False,
+        )
+
+    def test_add_inserts_event_in_one_query(self):
+        with self.assertNumQueries(1):
+            event = self.add()
+
+        event.refresh_from_db()
+        self.assertEqual(event.kind, "charge.succeeded")
+        self.assertEqual(event.webhook_message["id"], "evt_1")
+        self.assertIsNotNone(event.created_at)
+
+    def test_add_skips_duplicate_in_one_query(self):
+        metrics = get_metrics_backend()
+        duplicates = metrics.get("stripe.event.duplicate")
+        kind_duplicates = metrics.get("stripe.event.duplicate.kind.charge.succeeded")
+        self.add()
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.add())
+
+        self.assertEqual(StripeEvent.objects.filter(stripe_id="evt_1").count(), 1)
+        self.assertEqual(metrics.get("stripe.event.duplicate"), duplicates + 1)
+        self.assertEqual(
+            metrics.get("stripe.event.duplicate.kind.charge.succeeded"),
+            kind_duplicates + 1,
+        )
+
+    @patch("django_stripe.utils.db.OnConflict", None)
+    def test_add_skips_duplicate_without_on_conflict_support(self):
+        # Django < 4.1
+        self.assertIsNotNone(self.add())
+        self.assertIsNone(self.add())
+
+        self.assertEqual(StripeEvent.objects.filter(stripe_id="evt_1").count(), 1)
+
+    @override_settings(STRIPE_CONFIG={"EVENT_INGESTION": "handled"})
+    def test_handled_policy_skips_unhandled_kinds(self):
+        skipped = get_metrics_backend().get("stripe.event.skipped")
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.add())
+
+        self.assertFalse(StripeEvent.objects.exists())
+        self.assertFalse(StripeEventSummary.objects.exists())
+        self.assertEqual(get_metrics_backend().get("stripe.event.skipped"), skipped + 1)
+
+        event = StripeEventAction.add(
+            stripe_id="evt_2",
+            kind="product.updated",
+            livemode=False,
+            api_version="2024-06-20",
+            message={"id": "evt_2", "type": "product.updated"},
+            process=False,
+        )
+        self.assertIsNotNone(event)
+
+    @override_settings(STRIPE_CONFIG={"EVENT_INGESTION": "summary"})
+    def test_summary_policy_counts_unhandled_kinds(self):
+        self.add("evt_1")
+        # the counter row exists, a single update
+        with self.assertNumQueries(1):
+            self.add("evt_2")
+
+        self.assertFalse(StripeEvent.objects.exists())
+        summary = StripeEventSummary.objects.get(kind="charge.succeeded")
+        self.assertEqual(summary.count, 2)
+        self.assertEqual(summary.last_event_id, "evt_2")
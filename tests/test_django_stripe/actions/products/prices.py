@@ -187,3 +187,49 @@ class StripePriceActionTestCase(TestCase):
         existing_price1.refresh_from_db()
         self.assertEqual(existing_price1.unit_amount, 1000)
         self.assertEqual(existing_price1.active, True)
+
+    def test_sync_batch_resolves_products_in_one_query(self):
+        """Test batch synchronization does not query products per price."""
+        batch_data = []
+        for i in range(3):
+            price_data = self.stripe_price_data.copy()
+            price_data["id"] = f"price_{i}"
+            batch_data.append(price_data)
+
+        action = StripePriceAction()
+        # product lookup, prices lookup and bulk insert
+        with self.assertNumQueries(3):
+            action.sync_batch(batch_data)
+
+        self.assertEqual(StripePrice.objects.filter(product=self.product).count(), 3)
+
+    @patch("stripe.Product.auto_paging_iter")
+    def test_sync_batch_creates_missing_products(self, mock_product_list):
+        """Test batch synchronization lists and creates missing products in bulk."""
+        new_product_data = self.stripe_product_data.copy()
+        new_product_data["id"] = "prod_new"
+        mock_product_list.return_value = [new_product_data]
+
+        batch_data = [self.stripe_price_data.copy(), self.stripe_price_data.copy()]
+        batch_data[1]["id"] = "price_1MoBy6LkdIwHu7ixZhnattbh"
+        batch_data[1]["product"] = "prod_new"
+
+        action = StripePriceAction()
+        action.sync_batch(batch_data)
+
+        mock_product_list.assert_called_once_with(ids=["prod_new"], limit=100)
+        price = StripePrice.objects.get(stripe_id="price_1MoBy6LkdIwHu7ixZhnattbh")
+        self.assertEqual(price.product.stripe_id, "prod_new")
+        self.assertEqual(price.product.name, "Gold Plan")
+
+    @patch("stripe.Product.auto_paging_iter")
+    def test_sync_batch_logs_products_missing_in_stripe(self, mock_product_list):
+        mock_product_list.return_value = []
+        price_data = self.stripe_price_data.copy()
+        price_data["product"] = "prod_deleted"
+
+        with self.assertLogs("django_stripe.actions.products", "WARNING") as logs:
+            StripePriceAction().sync_batch([price_data.copy()])
+
+        self.assertIn("product_id=prod_deleted", logs.output[0])
+        self.assertIsNone(StripePrice.objects.get(stripe_id=price_data["id"]).product)
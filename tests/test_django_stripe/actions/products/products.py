@@ -6,6 +6,7 @@ from django.test import TestCase
 # Django Stripe Stuff
 from django_stripe.actions import StripeProductAction
 from django_stripe.models import StripeProduct
+from tests.fakes import FakeStripeListAPI
 
 
 class StripeProductActionTestCase(TestCase):
@@ -132,3 +133,322 @@ class StripeProductActionTestCase(TestCase):
         self.assertEqual(
             new_product.description, new_stripe_product_data["description"]
         )
+
+    def test_sync_all_concurrent(self):
+        fake_stripe_product = FakeStripeListAPI(
+            [
+                {
+                    "id": f"prod_{i}",
+                    "object": "product",
+                    "active": True,
+                    "created": 1678833149 + i * 86400,
+                    "livemode": False,
+                    "metadata": {},
+                    "name": f"Plan {i}",
+                    "updated": 1678833149,
+                }
+                for i in range(25)
+            ]
+            + [
+                {
+                    "id": "prod_old",
+                    "object": "product",
+                    "active": True,
+                    # older than STRIPE_EPOCH
+                    "created": 1000000000,
+                    "livemode": False,
+                    "metadata": {},
+                    "name": "Old Plan",
+                    "updated": 1000000000,
+                }
+            ],
+            latency=0.001,
+        )
+        StripeProduct.objects.create(
+            stripe_id="prod_deleted",
+            name="Deleted Plan",
+            active=True,
+            created=0,
+            updated=0,
+        )
+
+        self.action.batch_size = 4
+        with patch.object(self.action, "stripe_object_class", fake_stripe_product):
+            self.action.sync_all(workers=3)
+
+        # every created window was listed
+        self.assertEqual(
+            len({str(call["created"]) for call in fake_stripe_product.calls}), 12
+        )
+        self.assertEqual(
+            StripeProduct.objects.filter(deleted_at__isnull=True).count(), 26
+        )
+        self.assertIsNotNone(
+            StripeProduct.objects.get(stripe_id="prod_deleted").deleted_at
+        )
+
+    def test_sync_batch_upsert(self):
+        StripeProduct.objects.create(
+            stripe_id="prod_existing",
+            name="Old Plan",
+            active=False,
+            created=1678833149,
+            updated=1678833149,
+        )
+        batch = [
+            {
+                "id": stripe_id,
+                "object": "product",
+                "active": True,
+                "created": 1678833149,
+                "description": None,
+                "livemode": False,
+                "metadata": {},
+                "name": "Gold Plan",
+                "updated": 1680000000,
+            }
+            for stripe_id in ["prod_existing", "prod_new"]
+        ]
+
+        self.action.use_upsert = True
+        with self.assertNumQueries(1):
+            self.action.sync_batch(batch)
+
+        self.assertEqual(StripeProduct.objects.count(), 2)
+        existing_product = StripeProduct.objects.get(stripe_id="prod_existing")
+        self.assertEqual(existing_product.name, "Gold Plan")
+        self.assertTrue(existing_product.active)
+        self.assertEqual(existing_product.updated, 1680000000)
+
+    def test_sync_batch_skips_unchanged(self):
+        stripe_product_data = {
+            "id": "prod_NWjs8kKbJWmuuc",
+            "object": "product",
+            "active": True,
+            "created": 1678833149,
+            "livemode": False,
+            "metadata": {},
+            "name": "Gold Plan",
+            "updated": 1678833149,
+        }
+        self.action.skip_unchanged = True
+
+        result = self.action.sync_batch([stripe_product_data.copy()])
+        self.assertEqual(result, {"written": 1, "skipped": 0})
+
+        # only the lookup of the existing products
+        with self.assertNumQueries(1):
+            result = self.action.sync_batch([stripe_product_data.copy()])
+        self.assertEqual(result, {"written": 0, "skipped": 1})
+
+        stripe_product_data["name"] = "Platinum Plan"
+        result = self.action.sync_batch([stripe_product_data.copy()])
+        self.assertEqual(result, {"written": 1, "skipped": 0})
+        self.assertEqual(
+            StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc").name,
+            "Platinum Plan",
+        )
+
+    def test_sync_skips_unchanged(self):
+        stripe_product_data = {
+            "id": "prod_NWjs8kKbJWmuuc",
+            "object": "product",
+            "active": True,
+            "created": 1678833149,
+            "livemode": False,
+            "metadata": {},
+            "name": "Gold Plan",
+            "updated": 1678833149,
+        }
+        self.action.skip_unchanged = True
+        product = self.action.sync(stripe_product_data.copy())
+
+        with self.assertNumQueries(1):
+            unchanged_product = self.action.sync(stripe_product_data.copy())
+
+        self.assertEqual(unchanged_product, product)
+
+    def test_sync_if_newer_skips_stale_events(self):
+        stripe_product_data = {
+            "id": "prod_NWjs8kKbJWmuuc",
+            "object": "product",
+            "active": True,
+            "created": 1678833149,
+            "livemode": False,
+            "metadata": {},
+            "name": "Gold Plan",
+            "updated": 1678833149,
+        }
+
+        # a single INSERT ... ON CONFLICT DO UPDATE ... WHERE
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                self.action.sync_if_newer(stripe_product_data.copy(), 1700000200)
+            )
+
+        # stale event, no SELECT and no write
+        stripe_product_data["name"] = "Silver Plan"
+        with self.assertNumQueries(1):
+            self.assertFalse(
+                self.action.sync_if_newer(stripe_product_data.copy(), 1700000100)
+            )
+        product = StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc")
+        self.assertEqual(product.name, "Gold Plan")
+        self.assertEqual(product.last_event_created, 1700000200)
+
+        stripe_product_data["name"] = "Platinum Plan"
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                self.action.sync_if_newer(stripe_product_data.copy(), 1700000300)
+            )
+        product.refresh_from_db()
+        self.assertEqual(product.name, "Platinum Plan")
+        self.assertEqual(product.last_event_created, 1700000300)
+
+    def test_sync_if_newer_skips_unchanged_objects(self):
+        stripe_product_data = {
+            "id": "prod_NWjs8kKbJWmuuc",
+            "object": "product",
+            "active": True,
+            "created": 1678833149,
+            "livemode": False,
+            "metadata": {},
+            "name": "Gold Plan",
+            "updated": 1678833149,
+        }
+        self.action.skip_unchanged = True
+        self.assertTrue(
+            self.action.sync_if_newer(stripe_product_data.copy(), 1700000100)
+        )
+        updated_at = StripeProduct.objects.get(
+            stripe_id="prod_NWjs8kKbJWmuuc"
+        ).updated_at
+
+        # a newer event with the same object data
+        with self.assertNumQueries(1):
+            self.assertFalse(
+                self.action.sync_if_newer(stripe_product_data.copy(), 1700000200)
+            )
+        product = StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc")
+        self.assertEqual(product.updated_at, updated_at)
+        self.assertEqual(product.last_event_created, 1700000100)
+
+        stripe_product_data["name"] = "Silver Plan"
+        self.assertTrue(
+            self.action.sync_if_newer(stripe_product_data.copy(), 1700000300)
+        )
+        product.refresh_from_db()
+        self.assertEqual(product.name, "Silver Plan")
+
+    @patch(
+        "django_stripe.actions.mixins.supports_conditional_upsert",
+        return_value=False,
+    )
+    def test_sync_if_newer_retries_update_after_concurrent_insert(self, _):
+        stripe_product_data = {
+            "id": "prod_NWjs8kKbJWmuuc",
+            "object": "product",
+            "active": True,
+            "created": 1678833149,
+            "livemode": False,
+            "metadata": {},
+            "name": "Gold Plan",
+            "updated": 1678833149,
+        }
+
+        def insert_older(model_obj, using=None):
+            # an older event of the object inserted the row in the meantime
+            StripeProduct.objects.create(
+                stripe_id=model_obj.stripe_id,
+                name="Old Plan",
+                active=True,
+                created=1678833149,
+                updated=1678833149,
+                last_event_created=1700000100,
+            )
+            return False
+
+        with patch(
+            "django_stripe.actions.mixins.insert_if_absent", side_effect=insert_older
+        ):
+            self.assertTrue(
+                self.action.sync_if_newer(stripe_product_data.copy(), 1700000200)
+            )
+
+        product = StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc")
+        self.assertEqual(product.name, "Gold Plan")
+        self.assertEqual(product.last_event_created, 1700000200)
+
+    def test_sync_batch_skips_stale_events(self):
+        self.assert_sync_batch_skips_stale_events()
+
+    def test_sync_batch_skips_stale_events_in_one_query(self):
+        self.action.skip_unchanged = True
+        batch = [
+            {
+                "id": "prod_NWjs8kKbJWmuuc",
+                "object": "product",
+                "active": True,
+                "created": 1678833149,
+                "livemode": False,
+                "metadata": {},
+                "name": "Gold Plan",
+                "updated": 1678833149,
+            }
+        ]
+        self.action.sync_batch(
+            [batch[0].copy()], events_created={"prod_NWjs8kKbJWmuuc": 1700000200}
+        )
+
+        # a stale event and a newer event with the same object data
+        for event_created in (1700000100, 1700000300):
+            with self.assertNumQueries(1):
+                result = self.action.sync_batch(
+                    [batch[0].copy()],
+                    events_created={"prod_NWjs8kKbJWmuuc": event_created},
+                )
+            self.assertEqual(result, {"written": 0, "skipped": 1})
+
+        product = StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc")
+        self.assertEqual(product.last_event_created, 1700000200)
+
+    @patch(
+        "django_stripe.actions.mixins.supports_conditional_upsert",
+        return_value=False,
+    )
+    def test_sync_batch_skips_stale_events_without_conditional_upsert(self, _):
+        self.assert_sync_batch_skips_stale_events()
+
+    def assert_sync_batch_skips_stale_events(self):
+        batch = [
+            {
+                "id": stripe_id,
+                "object": "product",
+                "active": True,
+                "created": 1678833149,
+                "livemode": False,
+                "metadata": {},
+                "name": "Gold Plan",
+                "updated": 1678833149,
+            }
+            for stripe_id in ["prod_stale", "prod_newer"]
+        ]
+        events_created = {"prod_stale": 1700000200, "prod_newer": 1700000200}
+        self.action.sync_batch([data.copy() for data in batch], None, events_created)
+
+        for data in batch:
+            data["name"] = "Silver Plan"
+        events_created = {"prod_stale": 1700000100, "prod_newer": 1700000300}
+        for use_upsert in (False, True):
+            self.action.use_upsert = use_upsert
+            result = self.action.sync_batch(
+                [data.copy() for data in batch], events_created=events_created
+            )
+            self.assertEqual(result, {"written": 1, "skipped": 1})
+
+        self.assertEqual(
+            StripeProduct.objects.get(stripe_id="prod_stale").name, "Gold Plan"
+        )
+        newer = StripeProduct.objects.get(stripe_id="prod_newer")
+        self.assertEqual(newer.name, "Silver Plan")
+        self.assertEqual(newer.last_event_created, 1700000300)
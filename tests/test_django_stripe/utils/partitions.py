@@ -0,0 +1,73 @@
+# Standard Library Stuff
+import gzip
+import json
+import tempfile
+from datetime import datetime, timezone
+
+# Third Party Stuff
+from django.core.management import call_command
+from django.test import TestCase
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+from django_stripe.models import StripeEvent
+from django_stripe.utils.partitions import MonthlyPartitions, add_months, month_start
+
+
+class MonthlyPartitionsTestCase(TestCase):
+    def add(self, stripe_id, created):
+        return StripeEventAction.add(
+            stripe_id=stripe_id,
+            kind="charge.succeeded",
+            livemode=False,
+            api_version="2024-06-20",
+            message={"id": stripe_id, "type": "charge.succeeded", "created": created},
+            process=False,
+        )
+
+    def test_month_helpers(self):
+        month = datetime(2024, 11, 1, tzinfo=timezone.utc)
+        self.assertEqual(
+            add_months(month, 2), datetime(2025, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            add_months(month, -11), datetime(2023, 12, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(month_start(1732060800), month)
+
+    def test_partition_and_drop_expired(self):
+        now = datetime.now(tz=timezone.utc)
+        current = month_start(int(now.timestamp()))
+        old_month = add_months(current, -14)
+        self.add("evt_old", int(old_month.timestamp()) + 60)
+        self.add("evt_new", int(now.timestamp()))
+
+        partitions = MonthlyPartitions(StripeEvent)
+        self.assertFalse(partitions.is_partitioned())
+        partitions.partition(months_ahead=1)
+
+        self.assertTrue(partitions.is_partitioned())
+        names = [name for name, _ in partitions.get_partitions()]
+        self.assertEqual(names[0], partitions.partition_name(old_month))
+        self.assertEqual(names[-1], partitions.partition_name(add_months(current, 1)))
+        self.assertEqual(len(names), 16)
+
+        # rows were copied and inserts still dedupe on the stripe id
+        self.assertEqual(StripeEvent.objects.count(), 2)
+        self.assertIsNone(self.add("evt_new", int(now.timestamp())))
+        self.assertIsNotNone(self.add("evt_newer", int(now.timestamp())))
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command(
+                "archive_stripe_events", retention_months=12, archive_dir=archive_dir
+            )
+            path = f"{archive_dir}/{partitions.partition_name(old_month)}.jsonl.gz"
+            with gzip.open(path, "rt") as archive:
+                rows = [json.loads(line) for line in archive]
+
+        self.assertEqual([row["stripe_id"] for row in rows], ["evt_old"])
+        self.assertEqual(
+            set(StripeEvent.objects.values_list("stripe_id", flat=True)),
+            {"evt_new", "evt_newer"},
+        )
+        self.assertEqual(len(partitions.get_partitions()), 14)
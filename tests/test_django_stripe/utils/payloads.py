@@ -0,0 +1,109 @@
+# Third Party Stuff
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models
+from django.test import SimpleTestCase, TestCase
+
+# Django Stripe Stuff
+from django_stripe.models import StripeEvent
+from django_stripe.models.fields import CompressedJSONField, PackedPayload
+from django_stripe.utils.payloads import (
+    apply_json_diff,
+    json_diff,
+    pack_payload,
+    unpack_payload,
+)
+
+
+class CompressedPayload(models.Model):
+    message = CompressedJSONField()
+    validated = CompressedJSONField(null=True, diff_against="message")
+
+    class Meta:
+        app_label = "django_stripe"
+
+
+class PayloadCodecTestCase(SimpleTestCase):
+    def setUp(self):
+        self.message = {
+            "id": "evt_1",
+            "type": "customer.updated",
+            "data": {"object": {"id": "cus_1", "name": "Jenny", "phone": None}},
+            "pending_webhooks": 2,
+        }
+
+    def test_diff_round_trip(self):
+        validated = {
+            "id": "evt_1",
+            "type": "customer.updated",
+            "data": {"object": {"id": "cus_1", "name": "Jenny Rosen"}},
+            "pending_webhooks": 0,
+            "request": None,
+        }
+
+        diff = json_diff(self.message, validated)
+
+        self.assertEqual(
+            diff,
+            {
+                "+": {"pending_webhooks": 0, "request": None},
+                "~": {
+                    "data": {
+                        "~": {"object": {"+": {"name": "Jenny Rosen"}, "-": ["phone"]}}
+                    }
+                },
+            },
+        )
+        self.assertEqual(apply_json_diff(self.message, diff), validated)
+        self.assertEqual(json_diff(self.message, self.message), {})
+        self.assertEqual(apply_json_diff(self.message, {"=": [1]}), [1])
+
+    def test_pack_is_smaller_and_round_trips(self):
+        message = {**self.message, "items": [{"price": "price_1"}] * 100}
+
+        packed = pack_payload(message)
+        packed_diff = pack_payload(message, base=message)
+
+        self.assertLess(len(packed), len(str(message)) // 10)
+        self.assertLess(len(packed_diff), 16)
+        self.assertEqual(unpack_payload(packed), message)
+        self.assertEqual(unpack_payload(packed_diff, get_base=lambda: message), message)
+
+    def test_plain_json_of_converted_column_is_unpacked(self):
+        self.assertEqual(unpack_payload(b'{"id": "evt_1"}'), {"id": "evt_1"})
+
+    def test_mismatched_storage_fails(self):
+        packed = memoryview(pack_payload(self.message))
+        with self.assertRaisesMessage(ImproperlyConfigured, "EVENT_PAYLOAD_STORAGE"):
+            StripeEvent._meta.get_field("webhook_message").from_db_value(
+                packed, None, connection
+            )
+
+        with self.assertRaisesMessage(ImproperlyConfigured, "EVENT_PAYLOAD_STORAGE"):
+            CompressedPayload._meta.get_field("message").from_db_value(
+                '{"id": "evt_1"}', None, connection
+            )
+
+
+class CompressedJSONFieldTestCase(TestCase):
+    # the table of the test model is created with the test database
+    def test_values_are_unpacked_lazily(self):
+        message = {"id": "evt_1", "data": {"object": {"id": "cus_1"}}, "livemode": 0}
+        validated = {"id": "evt_1", "data": {"object": {"id": "cus_1"}}, "livemode": 1}
+        payload = CompressedPayload.objects.create(message=message, validated=validated)
+
+        payload = CompressedPayload.objects.get(pk=payload.pk)
+        self.assertIsInstance(payload.__dict__["validated"], PackedPayload)
+        self.assertEqual(payload.validated, validated)
+        self.assertEqual(payload.message, message)
+
+        # the validated copy is stored as a diff of the message
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT octet_length(validated) FROM %s"
+                % CompressedPayload._meta.db_table
+            )
+            self.assertLess(cursor.fetchone()[0], len(pack_payload(validated)))
+
+        payload.validated = None
+        payload.save()
+        self.assertIsNone(CompressedPayload.objects.get(pk=payload.pk).validated)
@@ -0,0 +1,94 @@
+# Standard Library Stuff
+import threading
+import time
+
+# Third Party Stuff
+from django.test import SimpleTestCase
+
+# Django Stripe Stuff
+from django_stripe.utils.pipeline import (
+    RateLimiter,
+    SyncPipeline,
+    split_created_windows,
+)
+
+
+class SplitCreatedWindowsTestCase(SimpleTestCase):
+    def test_windows_are_contiguous_and_open_ended(self):
+        windows = split_created_windows(0, 100, 4)
+
+        self.assertEqual(
+            windows,
+            [
+                {"lt": 25},
+                {"gte": 25, "lt": 50},
+                {"gte": 50, "lt": 75},
+                {"gte": 75},
+            ],
+        )
+
+    def test_small_range(self):
+        self.assertEqual(split_created_windows(0, 2, 4), [{"lt": 1}, {"gte": 1}])
+
+    def test_single_window_is_unbounded(self):
+        self.assertEqual(split_created_windows(0, 100, 1), [{}])
+
+
+class SyncPipelineTestCase(SimpleTestCase):
+    def test_run_writes_every_batch(self):
+        written = []
+        pipeline = SyncPipeline(writer=written.append, workers=3, queue_size=1)
+
+        pipeline.run([lambda i=i: ([i, j] for j in range(5)) for i in range(6)])
+
+        self.assertEqual(len(written), 30)
+        self.assertCountEqual(written, [[i, j] for i in range(6) for j in range(5)])
+
+    def test_run_raises_fetch_errors(self):
+        def failing_fetch():
+            yield [1]
+            raise ValueError("boom")
+
+        pipeline = SyncPipeline(writer=lambda batch: None, workers=2)
+
+        with self.assertRaises(ValueError):
+            pipeline.run([failing_fetch, lambda: iter([[2]])])
+
+    def test_run_stops_fetching_when_writer_fails(self):
+        def writer(batch):
+            raise RuntimeError("db down")
+
+        pipeline = SyncPipeline(writer=writer, workers=2, queue_size=1)
+
+        with self.assertRaises(RuntimeError):
+            pipeline.run([lambda: ([i] for i in range(1000)) for _ in range(4)])
+
+
+class RateLimiterTestCase(SimpleTestCase):
+    def test_calls_of_all_threads_are_spaced_out(self):
+        limiter = RateLimiter(rate=100)
+        calls = []
+
+        def call():
+            for _ in range(5):
+                limiter.wait()
+                calls.append(time.monotonic())
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        calls.sort()
+        # 20 calls at 100 per second take at least 0.19 seconds
+        self.assertGreaterEqual(calls[-1] - calls[0], 0.18)
+
+    def test_no_limit(self):
+        limiter = RateLimiter()
+        started = time.monotonic()
+
+        for _ in range(1000):
+            limiter.wait()
+
+        self.assertLess(time.monotonic() - started, 0.1)
@@ -3,12 +3,14 @@ from unittest.mock import patch
 
 # Third Party Stuff
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
 # Django Stripe Stuff
-from django_stripe.models import StripeCustomer
+from django_stripe.models import StripeCustomer, StripeEvent
 
 
 class CustomerUpdatedWebhookTestCase(TestCase):
@@ -114,6 +116,31 @@ class CustomerUpdatedWebhookTestCase(TestCase):
             self.event_data["data"]["object"]["description"],
         )  # Updated description
 
+    @patch("stripe.Event.retrieve")
+    def test_event_is_saved_once(self, mock_event):
+        mock_event.return_value = self.event_data.copy()
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(
+                reverse("stripe-webhook-list"), self.event_data, format="json"
+            )
+
+        table = StripeEvent._meta.db_table
+        event_updates = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith(f'UPDATE "{table}"')
+        ]
+        self.assertEqual(len(event_updates), 1)
+        # only the changed columns are written, not the webhook message
+        self.assertNotIn("webhook_message", event_updates[0])
+
+        event = StripeEvent.objects.get(stripe_id=self.event_data["id"])
+        self.assertTrue(event.valid)
+        self.assertTrue(event.processed)
+        self.assertEqual(event.customer, self.customer)
+        self.assertEqual(event.validated_message, self.event_data)
+
 
 class CustomerCreatedWebhookTestCase(TestCase):
     def setUp(self):
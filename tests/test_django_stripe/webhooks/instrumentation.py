@@ -0,0 +1,116 @@
+# Standard Library Stuff
+import json
+from unittest.mock import AsyncMock, patch
+
+# Third Party Stuff
+import stripe
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+# Django Stripe Stuff
+from django_stripe.instrumentation import stage_completed
+from django_stripe.metrics import get_metrics_backend
+from tests.fakes import make_product_event
+
+
+class FakeHTTPClient:
+    name = "fake"
+
+    def __init__(self, content):
+        self.content = content
+
+    def request_with_retries(self, method, url, headers, post_data=None, **kwargs):
+        return self.content, 200, {}
+
+
+@override_settings(STRIPE_CONFIG={"WEBHOOK_INSTRUMENTATION": True})
+class WebhookInstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse("stripe-webhook-list")
+        self.client = APIClient()
+        self.event_data = make_product_event("evt_1PyqwGIO5cnPOFxQNKVNMAsn")
+
+        self.stages = {}
+
+        def receiver(stage, kind, seconds, queries, stripe_requests, **kwargs):
+            self.stages[stage] = (kind, queries, stripe_requests)
+
+        stage_completed.connect(receiver, weak=False, dispatch_uid="test")
+        self.addCleanup(stage_completed.disconnect, dispatch_uid="test")
+
+    @patch("stripe.api_key", "sk_test_123")
+    @patch("stripe.default_http_client")
+    def test_stages_are_timed(self, _):
+        stripe.default_http_client = FakeHTTPClient(json.dumps(self.event_data))
+        metrics = get_metrics_backend()
+        timings = len(metrics.get_timings("stripe.webhook.validate.seconds"))
+
+        response = self.client.post(self.url, self.event_data, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.stages),
+            {
+                "webhook",
+                "insert",
+                "validate",
+                "link_customer",
+                "process_webhook",
+                "signal",
+                "save",
+            },
+        )
+        kind = self.event_data["type"]
+        self.assertEqual(self.stages["insert"], (kind, 1, 0))
+        # the event is retrieved from stripe
+        self.assertEqual(self.stages["validate"], (kind, 0, 1))
+        self.assertEqual(self.stages["save"], (kind, 1, 0))
+        self.assertEqual(self.stages["webhook"][2], 1)
+        self.assertEqual(
+            len(metrics.get_timings("stripe.webhook.validate.seconds")), timings + 1
+        )
+        self.assertGreaterEqual(
+            metrics.get(f"stripe.webhook.process_webhook.queries.kind.{kind}"), 1
+        )
+
+    @patch("stripe.Event.retrieve_async", new_callable=AsyncMock)
+    async def test_async_webhook_records_the_same_stages(self, mock_retrieve_async):
+        mock_retrieve_async.return_value = self.event_data.copy()
+
+        response = await self.async_client.post(
+            reverse("stripe-async-webhook"),
+            json.dumps(self.event_data),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.stages),
+            {
+                "webhook",
+                "insert",
+                "validate",
+                "link_customer",
+                "process_webhook",
+                "signal",
+                "save",
+            },
+        )
+        kind = self.event_data["type"]
+        self.assertEqual(self.stages["insert"], (kind, 1, 0))
+        self.assertEqual(self.stages["save"], (kind, 1, 0))
+        # queries of the database thread are counted by the webhook stage
+        self.assertGreaterEqual(
+            self.stages["webhook"][1],
+            sum(self.stages[name][1] for name in ("insert", "process_webhook", "save")),
+        )
+
+    @override_settings(STRIPE_CONFIG={})
+    @patch("stripe.Event.retrieve")
+    def test_disabled_by_default(self, mock_retrieve):
+        mock_retrieve.return_value = self.event_data
+
+        self.client.post(self.url, self.event_data, format="json")
+
+        self.assertEqual(self.stages, {})
@@ -8,7 +8,10 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 # Django Stripe Stuff
-from django_stripe.actions import StripeProductAction
+from django_stripe.actions import StripeEventAction, StripeProductAction
+from django_stripe.models import StripeEvent, StripeProduct
+from django_stripe.webhooks.products import ProductUpdatedWebhook
+from django_stripe.webhooks.register import registry
 
 
 class StripeProductWebhookTestCase(TestCase):
@@ -133,3 +136,76 @@ class StripeProductWebhookTestCase(TestCase):
         self.assertEqual(response.data["success"], True)
         product.refresh_from_db()
         self.assertEqual(product.description, "test description")
+
+    @patch("stripe.Event.retrieve")
+    def test_product_updated_webhook_batch(self, mock_stripe_event_retrieve):
+        events = []
+        for i, (product_id, name) in enumerate(
+            [("prod_1", "Silver Plan"), ("prod_2", "Gold Plan"), ("prod_1", "Platinum")]
+        ):
+            event_data = self.product_updated_data.copy()
+            event_data["id"] = f"evt_{i}"
+            event_data["data"] = {
+                "object": {**self.product_data, "id": product_id, "name": name}
+            }
+            events.append(
+                StripeEventAction.add(
+                    stripe_id=event_data["id"],
+                    kind=event_data["type"],
+                    livemode=False,
+                    api_version=event_data["api_version"],
+                    message=event_data,
+                    validated_message=event_data,
+                    process=False,
+                )
+            )
+
+        # conditional products upsert and events update
+        with self.assertNumQueries(2):
+            ProductUpdatedWebhook.process_batch(events)
+
+        mock_stripe_event_retrieve.assert_not_called()
+        self.assertEqual(StripeProduct.objects.get(stripe_id="prod_1").name, "Platinum")
+        self.assertEqual(
+            StripeProduct.objects.get(stripe_id="prod_2").name, "Gold Plan"
+        )
+        self.assertEqual(StripeEvent.objects.filter(processed=True).count(), 3)
+
+    @patch.dict(registry._registry)
+    @patch("stripe.Event.retrieve")
+    def test_custom_process_webhook_is_not_batched(self, mock_stripe_event_retrieve):
+        processed = []
+
+        # subclassing registers the webhook, restored by patch.dict
+
+        class CustomProductUpdatedWebhook(ProductUpdatedWebhook):
+            def process_webhook(self):
+                processed.append(self.event.stripe_id)
+                super().process_webhook()
+
+        self.assertTrue(ProductUpdatedWebhook.can_process_batch())
+        self.assertFalse(CustomProductUpdatedWebhook.can_process_batch())
+
+        events = []
+        for i in range(2):
+            event_data = self.product_updated_data.copy()
+            event_data["id"] = f"evt_{i}"
+            events.append(
+                StripeEventAction.add(
+                    stripe_id=event_data["id"],
+                    kind=event_data["type"],
+                    livemode=False,
+                    api_version=event_data["api_version"],
+                    message=event_data,
+                    validated_message=event_data,
+                    process=False,
+                )
+            )
+
+        self.assertEqual(CustomProductUpdatedWebhook.process_batch(events), 2)
+
+        mock_stripe_event_retrieve.assert_not_called()
+        self.assertEqual(processed, ["evt_0", "evt_1"])
+        self.assertTrue(
+            StripeProduct.objects.filter(stripe_id="prod_NWjs8kKbJWmuuc").exists()
+        )
@@ -0,0 +1,299 @@
+# Standard Library Stuff
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+# Third Party Stuff
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+from django_stripe.models import StripeEvent, StripeProduct
+from django_stripe.webhooks.queues import DatabaseQueueBackend, coalesce_events
+from tests.fakes import make_product_event
+
+
+@override_settings(STRIPE_CONFIG={"WEBHOOK_ENQUEUE": True})
+class DatabaseQueueBackendTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse("stripe-webhook-list")
+        self.client = APIClient()
+        self.event_data = make_product_event("evt_1PyqwGIO5cnPOFxQNKVNMAsn")
+
+    @patch("stripe.Event.retrieve")
+    def test_webhook_is_only_enqueued(self, mock_stripe_event_retrieve):
+        mock_stripe_event_retrieve.return_value = self.event_data
+
+        response = self.client.post(self.url, self.event_data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_stripe_event_retrieve.assert_not_called()
+        event = StripeEvent.objects.get(stripe_id=self.event_data["id"])
+        self.assertFalse(event.processed)
+        self.assertFalse(StripeProduct.objects.exists())
+
+        DatabaseQueueBackend().run_worker(once=True)
+
+        mock_stripe_event_retrieve.assert_called_once()
+        event.refresh_from_db()
+        self.assertTrue(event.processed)
+        self.assertTrue(
+            StripeProduct.objects.filter(stripe_id="prod_NWjs8kKbJWmuuc").exists()
+        )
+
+    def test_events_without_handler_are_not_claimed(self):
+        StripeEventAction.add(
+            stripe_id="evt_unhandled",
+            kind="charge.succeeded",
+            livemode=False,
+            api_version="2024-06-20",
+            message={"id": "evt_unhandled"},
+            process=False,
+        )
+
+        self.assertEqual(DatabaseQueueBackend().process_pending(), (0, 0))
+
+    @patch("stripe.Event.retrieve")
+    def test_failed_event_does_not_block_the_queue(self, mock_stripe_event_retrieve):
+        failing = make_product_event("evt_failing")
+        failing["data"]["object"]["id"] = "prod_failing"
+
+        def retrieve(stripe_id):
+            if stripe_id == failing["id"]:
+                raise Exception("boom")
+            return self.event_data
+
+        mock_stripe_event_retrieve.side_effect = retrieve
+        for event_data in (failing, self.event_data):
+            StripeEventAction.add(
+                stripe_id=event_data["id"],
+                kind=event_data["type"],
+                livemode=False,
+                api_version=event_data["api_version"],
+                message=event_data,
+                process=False,
+            )
+
+        self.assertEqual(DatabaseQueueBackend().process_pending(), (2, 1))
+        self.assertFalse(StripeEvent.objects.get(stripe_id="evt_failing").processed)
+        self.assertTrue(
+            StripeEvent.objects.get(stripe_id=self.event_data["id"]).processed
+        )
+
+    @override_settings(
+        STRIPE_CONFIG={
+            "WEBHOOK_ENQUEUE": True,
+            "WEBHOOK_MAX_ATTEMPTS": 2,
+            "WEBHOOK_RETRY_DELAY": 60,
+        }
+    )
+    @patch("stripe.Event.retrieve")
+    def test_failed_event_is_retried_with_backoff(self, mock_stripe_event_retrieve):
+        mock_stripe_event_retrieve.side_effect = Exception("boom")
+        StripeEventAction.add(
+            stripe_id=self.event_data["id"],
+            kind=self.event_data["type"],
+            livemode=False,
+            api_version=self.event_data["api_version"],
+            message=self.event_data,
+            process=False,
+        )
+        backend = DatabaseQueueBackend()
+
+        self.assertEqual(backend.process_pending(), (1, 0))
+        event = StripeEvent.objects.get(stripe_id=self.event_data["id"])
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, "Exception: boom")
+        self.assertAlmostEqual(
+            (event.next_attempt_at - timezone.now()).total_seconds(), 60, delta=5
+        )
+        self.assertIsNone(event.dead_lettered_at)
+
+        # not due yet
+        self.assertEqual(backend.process_pending(), (0, 0))
+
+        StripeEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(backend.process_pending(), (1, 0))
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 2)
+        self.assertIsNotNone(event.dead_lettered_at)
+
+        # dead lettered events are not retried
+        StripeEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(backend.process_pending(), (0, 0))
+
+    def test_batch_event_of_missing_customer_is_retried_with_backoff(self):
+        for stripe_id in ("evt_1", "evt_2", "evt_3"):
+            event_data = make_product_event(stripe_id)
+            event_data["data"]["object"]["id"] = f"prod_{stripe_id}"
+            event_data["data"]["object"]["customer"] = "cus_missing"
+            StripeEventAction.add(
+                stripe_id=stripe_id,
+                kind=event_data["type"],
+                livemode=False,
+                api_version=event_data["api_version"],
+                message=event_data,
+                validated_message=event_data,
+                process=False,
+            )
+        backend = DatabaseQueueBackend()
+
+        self.assertEqual(backend.process_pending(), (3, 0))
+        for event in StripeEvent.objects.all():
+            self.assertFalse(event.processed)
+            self.assertEqual(event.attempts, 1)
+            self.assertIsNotNone(event.next_attempt_at)
+
+        # not claimed again until their next attempt is due
+        self.assertEqual(backend.process_pending(), (0, 0))
+
+    @override_settings(STRIPE_CONFIG={"WEBHOOK_ENQUEUE": False})
+    @patch("stripe.Event.retrieve")
+    def test_new_events_are_left_to_the_request_without_enqueue(
+        self, mock_stripe_event_retrieve
+    ):
+        mock_stripe_event_retrieve.side_effect = Exception("boom")
+        for stripe_id in ("evt_new", "evt_failed"):
+            event_data = make_product_event(stripe_id)
+            StripeEventAction.add(
+                stripe_id=stripe_id,
+                kind=event_data["type"],
+                livemode=False,
+                api_version=event_data["api_version"],
+                message=event_data,
+                process=False,
+            )
+        # failed inside its webhook request
+        StripeEvent.objects.filter(stripe_id="evt_failed").update(
+            attempts=1, next_attempt_at=timezone.now()
+        )
+
+        self.assertEqual(DatabaseQueueBackend().process_pending(), (1, 0))
+        self.assertEqual(StripeEvent.objects.get(stripe_id="evt_new").attempts, 0)
+        self.assertEqual(StripeEvent.objects.get(stripe_id="evt_failed").attempts, 2)
+
+    @override_settings(
+        STRIPE_CONFIG={"WEBHOOK_RETRY_DELAY": 60, "WEBHOOK_RETRY_MAX_DELAY": 300}
+    )
+    def test_retry_delay_is_doubled_up_to_the_max(self):
+        delays = [
+            StripeEventAction.get_retry_delay(attempts) for attempts in (1, 2, 3, 4)
+        ]
+
+        self.assertEqual(
+            delays,
+            [timedelta(seconds=seconds) for seconds in (60, 120, 240, 300)],
+        )
+
+
+@override_settings(STRIPE_CONFIG={"WEBHOOK_ENQUEUE": True})
+class DatabaseQueueBackendLockingTestCase(TransactionTestCase):
+    def test_locked_events_are_skipped(self):
+        for stripe_id in ("evt_locked", "evt_free"):
+            event_data = make_product_event(stripe_id)
+            StripeEventAction.add(
+                stripe_id=stripe_id,
+                kind=event_data["type"],
+                livemode=False,
+                api_version=event_data["api_version"],
+                message=event_data,
+                validated_message=event_data,
+                process=False,
+            )
+
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            # another worker processing the event
+            with transaction.atomic():
+                StripeEvent.objects.select_for_update().get(stripe_id="evt_locked")
+                locked.set()
+                release.wait(5)
+            connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        locked.wait(5)
+        try:
+            self.assertEqual(DatabaseQueueBackend().process_pending(), (1, 1))
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertFalse(StripeEvent.objects.get(stripe_id="evt_locked").processed)
+        self.assertTrue(StripeEvent.objects.get(stripe_id="evt_free").processed)
+
+
+@override_settings(STRIPE_CONFIG={"WEBHOOK_ENQUEUE": True})
+class CoalesceEventsTestCase(TestCase):
+    def add(
+        self,
+        stripe_id,
+        kind,
+        created,
+        product_id="prod_NWjs8kKbJWmuuc",
+        validated=True,
+    ):
+        event_data = make_product_event(stripe_id, name=stripe_id)
+        event_data["type"] = kind
+        event_data["created"] = created
+        event_data["data"]["object"]["id"] = product_id
+        return StripeEventAction.add(
+            stripe_id=stripe_id,
+            kind=kind,
+            livemode=False,
+            api_version=event_data["api_version"],
+            message=event_data,
+            validated_message=event_data if validated else None,
+            process=False,
+        )
+
+    def test_only_newest_state_is_applied(self):
+        # received out of order
+        self.add("evt_2", "product.updated", 1726300962)
+        self.add("evt_3", "product.updated", 1726300963)
+        self.add("evt_1", "product.created", 1726300961)
+        self.add("evt_other", "product.updated", 1726300960, product_id="prod_other")
+
+        with patch("stripe.Event.retrieve") as mock_stripe_event_retrieve:
+            self.assertEqual(DatabaseQueueBackend().process_pending(), (4, 4))
+        mock_stripe_event_retrieve.assert_not_called()
+
+        self.assertEqual(
+            StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc").name, "evt_3"
+        )
+        self.assertEqual(
+            StripeProduct.objects.get(stripe_id="prod_other").name, "evt_other"
+        )
+        self.assertFalse(StripeEvent.objects.filter(processed=False).exists())
+
+    def test_events_of_other_kinds_are_not_superseded(self):
+        self.add("evt_1", "product.created", 1726300961)
+        self.add("evt_2", "product.updated", 1726300962)
+        self.add("evt_3", "product.updated", 1726300963)
+        self.add("evt_4", "product.deleted", 1726300964)
+
+        remaining, superseded = coalesce_events(list(StripeEvent.objects.all()))
+
+        self.assertEqual(
+            [event.stripe_id for event in remaining], ["evt_1", "evt_3", "evt_4"]
+        )
+        self.assertEqual([event.stripe_id for event in superseded], ["evt_2"])
+
+    def test_unvalidated_events_do_not_supersede(self):
+        self.add("evt_1", "product.updated", 1726300961)
+        # e.g. a forged delivery with a future created time
+        self.add("evt_forged", "product.updated", 1926300961, validated=False)
+
+        remaining, superseded = coalesce_events(list(StripeEvent.objects.all()))
+
+        self.assertEqual(
+            [event.stripe_id for event in remaining], ["evt_1", "evt_forged"]
+        )
+        self.assertEqual(superseded, [])
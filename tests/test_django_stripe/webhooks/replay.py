@@ -0,0 +1,87 @@
+# Standard Library Stuff
+from io import StringIO
+from unittest.mock import patch
+
+# Third Party Stuff
+from django.core.management import call_command
+from django.test import TestCase
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+from django_stripe.models import StripeEvent, StripeProduct
+from django_stripe.webhooks.products import ProductCreatedWebhook
+from django_stripe.webhooks.replay import EventReplay
+from tests.fakes import make_product_event
+
+
+class EventReplayTestCase(TestCase):
+    def setUp(self):
+        for stripe_id, created in (("evt_1", 1726300960), ("evt_2", 1726300970)):
+            event_data = {**make_product_event(stripe_id), "created": created}
+            StripeEventAction.add(
+                stripe_id=stripe_id,
+                kind=event_data["type"],
+                livemode=False,
+                api_version=event_data["api_version"],
+                message=event_data,
+                validated_message=event_data,
+            )
+        StripeEventAction.add(
+            stripe_id="evt_unhandled",
+            kind="charge.succeeded",
+            livemode=False,
+            api_version="2024-06-20",
+            message={"id": "evt_unhandled"},
+            process=False,
+        )
+        # e.g. overwritten by a buggy handler
+        StripeProduct.objects.update(name="Broken")
+
+    def test_replay_reruns_handlers(self):
+        progress = []
+        replay = EventReplay(kinds=["product.created"], processed=True)
+        replay.chunk_size = 1
+
+        result = replay.replay(progress=lambda *args: progress.append(args[:2]))
+
+        self.assertEqual(result, {"selected": 2, "replayed": 2, "failed": 0})
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+        product = StripeProduct.objects.get(stripe_id="prod_NWjs8kKbJWmuuc")
+        self.assertEqual(product.name, "Gold Plan")
+        self.assertFalse(StripeEvent.objects.get(stripe_id="evt_unhandled").processed)
+
+    def test_filters_and_dry_run(self):
+        self.assertEqual(EventReplay(since=1726300965).get_events().count(), 1)
+        self.assertEqual(EventReplay(until=1726300965).get_events().count(), 1)
+        self.assertEqual(EventReplay(processed=False).get_events().count(), 0)
+        self.assertEqual(EventReplay(valid=True).get_events().count(), 2)
+
+        result = EventReplay().replay(dry_run=True)
+
+        self.assertEqual(result, {"selected": 2, "replayed": 0, "failed": 0})
+        self.assertEqual(StripeProduct.objects.get().name, "Broken")
+
+    def test_failing_event_does_not_stop_the_replay(self):
+        with patch.object(
+            ProductCreatedWebhook,
+            "process_webhook",
+            side_effect=[Exception("Handler error"), None],
+        ):
+            result = EventReplay().replay()
+
+        self.assertEqual(result, {"selected": 2, "replayed": 1, "failed": 1})
+
+    def test_command(self):
+        stdout = StringIO()
+
+        call_command(
+            "replay_stripe_events",
+            "--kind",
+            "product.created",
+            "--processed",
+            "true",
+            "--dry-run",
+            stdout=stdout,
+        )
+
+        self.assertIn("2 events would be replayed", stdout.getvalue())
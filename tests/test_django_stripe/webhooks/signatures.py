@@ -0,0 +1,78 @@
+# Standard Library Stuff
+import json
+import time
+from unittest.mock import patch
+
+# Third Party Stuff
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+# Django Stripe Stuff
+from django_stripe.models import StripeEvent, StripeProduct
+from tests.fakes import WEBHOOK_SECRET, make_product_event, sign
+
+
+@override_settings(STRIPE_CONFIG={"WEBHOOK_SECRET": WEBHOOK_SECRET})
+class SignedWebhookTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse("stripe-webhook-list")
+        self.client = APIClient()
+        self.event_data = make_product_event("evt_1PyqwGIO5cnPOFxQNKVNMAsn")
+        self.payload = json.dumps(self.event_data)
+
+    def post(self, signature):
+        return self.client.generic(
+            "POST",
+            self.url,
+            self.payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature,
+        )
+
+    @patch("stripe.Event.retrieve")
+    def test_signed_payload_is_validated_locally(self, mock_stripe_event_retrieve):
+        response = self.post(sign(self.payload))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_stripe_event_retrieve.assert_not_called()
+        event = StripeEvent.objects.get(stripe_id=self.event_data["id"])
+        self.assertTrue(event.valid)
+        self.assertTrue(event.processed)
+        self.assertEqual(event.validated_message, self.event_data)
+        self.assertTrue(
+            StripeProduct.objects.filter(stripe_id="prod_NWjs8kKbJWmuuc").exists()
+        )
+
+    @patch("stripe.Event.retrieve")
+    def test_invalid_signature_is_rejected(self, mock_stripe_event_retrieve):
+        for signature in (sign(self.payload, secret="whsec_other"), "", "t=1"):
+            response = self.post(signature)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        mock_stripe_event_retrieve.assert_not_called()
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_signature_outside_tolerance_is_rejected(self):
+        response = self.post(sign(self.payload, timestamp=int(time.time()) - 301))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    @patch("stripe.Event.retrieve")
+    def test_retrieve_kinds_are_retrieved(self, mock_stripe_event_retrieve):
+        mock_stripe_event_retrieve.return_value = self.event_data
+        config = {
+            "WEBHOOK_SECRET": WEBHOOK_SECRET,
+            "WEBHOOK_RETRIEVE_KINDS": ["product.created"],
+        }
+
+        with override_settings(STRIPE_CONFIG=config):
+            response = self.post(sign(self.payload))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_stripe_event_retrieve.assert_called_once_with(self.event_data["id"])
+        self.assertTrue(
+            StripeEvent.objects.get(stripe_id=self.event_data["id"]).processed
+        )
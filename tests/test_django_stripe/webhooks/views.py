@@ -0,0 +1,99 @@
+# Standard Library Stuff
+import json
+from unittest.mock import AsyncMock, patch
+
+# Third Party Stuff
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+# Django Stripe Stuff
+from django_stripe.actions import StripeEventAction
+from django_stripe.models import StripeEvent, StripeProduct
+from tests.fakes import WEBHOOK_SECRET, make_product_event, sign
+
+
+class AsyncWebhookViewTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse("stripe-async-webhook")
+        self.event_data = make_product_event("evt_1PyqwGIO5cnPOFxQNKVNMAsn")
+        self.payload = json.dumps(self.event_data)
+
+    async def get_event(self):
+        return await StripeEvent.objects.aget(stripe_id=self.event_data["id"])
+
+    @patch("stripe.Event.retrieve_async", new_callable=AsyncMock)
+    async def test_event_is_retrieved_asynchronously(self, mock_retrieve_async):
+        mock_retrieve_async.return_value = self.event_data.copy()
+
+        response = await self.async_client.post(
+            self.url, self.payload, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        mock_retrieve_async.assert_awaited_once_with(self.event_data["id"])
+        event = await self.get_event()
+        self.assertTrue(event.valid)
+        self.assertTrue(event.processed)
+        product = await StripeProduct.objects.aget(stripe_id="prod_NWjs8kKbJWmuuc")
+        self.assertEqual(product.name, "Gold Plan")
+
+        # a redelivery is skipped
+        response = await self.async_client.post(
+            self.url, self.payload, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        mock_retrieve_async.assert_awaited_once()
+
+    @override_settings(STRIPE_CONFIG={"WEBHOOK_SECRET": WEBHOOK_SECRET})
+    @patch("stripe.Event.retrieve_async", new_callable=AsyncMock)
+    async def test_signed_payload_is_validated_locally(self, mock_retrieve_async):
+        response = await self.async_client.post(
+            self.url,
+            self.payload,
+            content_type="application/json",
+            headers={"Stripe-Signature": sign(self.payload)},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        mock_retrieve_async.assert_not_called()
+        event = await self.get_event()
+        self.assertTrue(event.processed)
+
+        response = await self.async_client.post(
+            self.url,
+            self.payload,
+            content_type="application/json",
+            headers={"Stripe-Signature": sign(self.payload, secret="whsec_wrong")},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @patch("stripe.Event.retrieve_async", new_callable=AsyncMock)
+    async def test_failed_event_is_scheduled_for_retry(self, mock_retrieve_async):
+        mock_retrieve_async.side_effect = Exception("boom")
+
+        with self.assertRaises(Exception):
+            await StripeEventAction.aadd(
+                stripe_id=self.event_data["id"],
+                kind=self.event_data["type"],
+                livemode=False,
+                api_version=self.event_data["api_version"],
+                message=self.event_data,
+            )
+
+        event = await self.get_event()
+        self.assertFalse(event.processed)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, "Exception: boom")
+        self.assertIsNotNone(event.next_attempt_at)
+
+    @override_settings(STRIPE_CONFIG={"WEBHOOK_ENQUEUE": True})
+    async def test_enqueued_event_is_only_persisted(self):
+        response = await self.async_client.post(
+            self.url, self.payload, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        event = await self.get_event()
+        self.assertFalse(event.processed)
+        self.assertFalse(await sync_to_async(StripeProduct.objects.exists)())
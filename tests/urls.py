@@ -19,6 +19,7 @@ from django.contrib import admin
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from django_stripe.views import StripeWebhookView
 from tests.views import StripeWebhookViewSet
 
 default_router = DefaultRouter(trailing_slash=False)
@@ -29,4 +30,9 @@ default_router.register(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path(
+        "stripe/async-webhook",
+        StripeWebhookView.as_view(),
+        name="stripe-async-webhook",
+    ),
 ] + default_router.urls
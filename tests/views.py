@@ -1,8 +1,10 @@
 from django.http import Http404
 from rest_framework import viewsets
 from rest_framework.response import Response
+from stripe.error import SignatureVerificationError
 
 from django_stripe.actions import StripeWebhook
+from django_stripe.settings import stripe_settings
 
 
 class StripeWebhookViewSet(viewsets.GenericViewSet):
@@ -10,6 +12,16 @@ class StripeWebhookViewSet(viewsets.GenericViewSet):
     # Ref: https://stripe.com/docs/webhooks/signatures
 
     def create(self, request, *args, **kwargs):
+        if stripe_settings.WEBHOOK_SECRET:
+            try:
+                event_data = StripeWebhook.construct_event(
+                    request.body, request.META.get("HTTP_STRIPE_SIGNATURE")
+                )
+            except SignatureVerificationError:
+                return Response({"success": False}, 400)
+            StripeWebhook.process_webhook(event_data, verified=True)
+            return Response({"success": True}, 200)
+
         try:
             event_data = request.data
             StripeWebhook.process_webhook(event_data)